@@ -6,6 +6,7 @@ import vertexai
 from vertexai import agent_engines
 from vertexai.preview.reasoning_engines import AdkApp
 from personal_assistant.agent import root_agent
+from personal_assistant.common.discovery_utils import prime_discovery_cache
 
 FLAGS = flags.FLAGS
 
@@ -34,6 +35,10 @@ def create(config: dict[str, str]) -> None:
     """
     print("Starting new agent deployment...")
 
+    # Ship pre-serialized discovery documents so cold instances skip parsing them
+    for path in prime_discovery_cache():
+        print(f"Cached discovery document: {path}")
+
     # Configure the ADK application
     adk_application = AdkApp(
         agent=root_agent,
@@ -10,6 +10,8 @@ import uvicorn
 from contextlib import asynccontextmanager
 from dotenv import load_dotenv
 from common.agent_utils import start_agent_session, agent_to_client_sse
+from dashboard_feed import get_dashboard_feed, dashboard_to_client_sse
+from personal_assistant.common.tool_utils import clear_service_cache
 from fastapi.responses import RedirectResponse, StreamingResponse
 from google.genai.types import Part, Content
 from datetime import datetime, timedelta
@@ -78,6 +80,23 @@ def fetch_weather():
     return {"weather": weather}
 
 
+@app.get("/dashboard/{user_id}")
+async def dashboard_sse_endpoint(user_id: int):
+    """SSE endpoint pushing inbox, calendar and weather changes to the dashboard"""
+
+    feed = get_dashboard_feed(str(user_id))
+    return StreamingResponse(
+        dashboard_to_client_sse(feed),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "Connection": "keep-alive",
+            "Access-Control-Allow-Origin": "*",
+            "Access-Control-Allow-Headers": "Cache-Control",
+        },
+    )
+
+
 @app.post("/agent/ask")
 async def talk_to_agent(message: MessageRequest):
     response = await agent.call_agent(message.message)
@@ -154,6 +173,7 @@ def oauth2callback(request: Request, code: str = None, error: str = None):
     "https://www.googleapis.com/auth/contacts",
     "https://www.googleapis.com/auth/gmail.readonly",
     "https://www.googleapis.com/auth/gmail.send",
+    "https://www.googleapis.com/auth/gmail.modify",
     ])
     flow.redirect_uri = "http://127.0.0.1:8000/oauth2callback"
     try:
@@ -173,6 +193,8 @@ def oauth2callback(request: Request, code: str = None, error: str = None):
     }
     with open("token.json", "w") as f:
         json.dump(creds_dict, f)
+    # Drop clients built with the previous token so the next tool call uses the new one
+    clear_service_cache()
 
     return {
         "message": "Authorization complete. You can safely close this page and return to the app."
@@ -4,11 +4,18 @@ from google.genai import types
 from . import prompt
 from .tool import (
     get_events,
+    resolve_event,
+    get_calendars,
+    check_availability,
+    find_free_slots,
     add_event,
+    add_events,
     cancel_event,
+    cancel_events,
     invite_attendee_to_event,
     respond_to_event,
     get_contact_info,
+    lookup_contact,
     add_contact_info,
 )
 
@@ -18,20 +25,12 @@ generate_content_config = types.GenerateContentConfig(
     temperature=0.2,
 )
 
-event_finder_agent = Agent(
-    name="event_finder_agent",
-    model=MODEL,
-    description="A specialist agent that finds or creates a single, specific event and returns its ID.",
-    instruction=prompt.EVENT_FINDER_AGENT_INSTR,
-    tools=[get_events],
-)
-
 contact_info_agent = Agent(
     name="contact_info_agent",
     model=MODEL,
     description=("Use this tool to find the email of a person."),
     instruction=prompt.CONTACT_INFO_AGENT_INSTR,
-    tools=[get_contact_info],
+    tools=[lookup_contact, get_contact_info],
 )
 
 calendar_agent = Agent(
@@ -41,13 +40,18 @@ calendar_agent = Agent(
     instruction=prompt.CALENDAR_AGENT_INSTR,
     tools=[
         get_events,
+        resolve_event,
+        get_calendars,
+        check_availability,
+        find_free_slots,
         add_event,
+        add_events,
         cancel_event,
+        cancel_events,
         respond_to_event,
         invite_attendee_to_event,
         add_contact_info,
         AgentTool(agent=contact_info_agent),
-        AgentTool(agent=event_finder_agent),
     ],
     generate_content_config=generate_content_config,
 )
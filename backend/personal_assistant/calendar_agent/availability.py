@@ -0,0 +1,96 @@
+from bisect import bisect_right
+from datetime import datetime, time, timedelta
+
+# Candidate slots start on multiples of this many minutes.
+SLOT_ALIGNMENT_MINUTES = 15
+
+
+def merge_intervals(intervals):
+    """
+    Merges overlapping or touching (start, end) intervals.
+
+    Returns:
+        list: Disjoint intervals sorted by start.
+    """
+    merged = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def _align(moment):
+    step = SLOT_ALIGNMENT_MINUTES * 60
+    seconds = moment.minute * 60 + moment.second + moment.microsecond / 1e6
+    remainder = seconds % step
+    if not remainder:
+        return moment
+    return moment + timedelta(seconds=step - remainder)
+
+
+def _working_windows(window_start, window_end, day_start, day_end, zone, weekends):
+    """
+    Yields the working-hours part of every day in [window_start, window_end).
+    """
+    day = window_start.astimezone(zone).date()
+    last_day = window_end.astimezone(zone).date()
+    while day <= last_day:
+        if weekends or day.weekday() < 5:
+            start = datetime.combine(day, day_start, tzinfo=zone)
+            end = datetime.combine(day, day_end, tzinfo=zone)
+            start, end = max(start, window_start), min(end, window_end)
+            if start < end:
+                yield start, end
+        day += timedelta(days=1)
+
+
+def find_slots(
+    busy,
+    window_start,
+    window_end,
+    duration,
+    zone,
+    day_start=time(9),
+    day_end=time(17),
+    weekends=False,
+    max_slots=5,
+):
+    """
+    Finds free slots of at least `duration` that fall within working hours.
+
+    Args:
+        busy (list): Merged busy intervals, sorted by start.
+        window_start, window_end (datetime): Aware bounds of the search.
+        duration (timedelta): Required slot length.
+        zone (tzinfo): Timezone the working hours refer to.
+
+    Returns:
+        list: Up to max_slots (start, end) tuples, earliest first.
+    """
+    busy_starts = [start for start, _ in busy]
+    slots = []
+    for start, end in _working_windows(
+        window_start, window_end, day_start, day_end, zone, weekends
+    ):
+        # First busy interval that could overlap this window
+        i = max(bisect_right(busy_starts, start) - 1, 0)
+        cursor = start
+        while cursor < end and len(slots) < max_slots:
+            while i < len(busy) and busy[i][1] <= cursor:
+                i += 1
+            if i < len(busy) and busy[i][0] <= cursor:
+                cursor = busy[i][1]
+                continue
+            gap_end = min(end, busy[i][0]) if i < len(busy) else end
+            slot_start = _align(cursor)
+            # Back-to-back candidates, so a long free gap offers several times
+            while slot_start + duration <= gap_end and len(slots) < max_slots:
+                slots.append((slot_start, slot_start + duration))
+                slot_start = _align(slot_start + duration)
+            cursor = gap_end
+        if len(slots) >= max_slots:
+            break
+    return slots
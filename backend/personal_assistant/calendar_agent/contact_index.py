@@ -0,0 +1,222 @@
+from googleapiclient.errors import HttpError
+from personal_assistant.common.tool_utils import on_account_reset
+import heapq
+import threading
+import time
+import unicodedata
+
+# Lookups within this many seconds of the last sync are answered without any
+# API call; after that one incremental (syncToken) call brings the index up to date.
+SYNC_INTERVAL_SECONDS = 60
+PAGE_SIZE = 1000
+PERSON_FIELDS = "names,emailAddresses"
+# Matches scoring below this are not worth showing.
+MIN_SCORE = 0.25
+
+
+def normalize(text):
+    """
+    Lowercases and strips accents so "José" matches "jose".
+    """
+    decomposed = unicodedata.normalize("NFKD", text or "")
+    return (
+        "".join(c for c in decomposed if not unicodedata.combining(c)).lower().strip()
+    )
+
+
+def trigrams(text):
+    padded = f"  {text} "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+def _similarity(a, b):
+    return len(a & b) / len(a | b)
+
+
+def _email_terms(email):
+    # "adam.smith@example.com" -> "adam smith"
+    local = email.split("@", 1)[0]
+    return " ".join(local.replace(".", " ").replace("_", " ").replace("-", " ").split())
+
+
+class ContactIndex:
+    """
+    In-memory index of the user's contacts, kept current through the People
+    API's sync tokens, with prefix and trigram matching on names and emails.
+    """
+
+    def __init__(self):
+        self.contacts = {}
+        self.sync_token = None
+        self._grams = {}
+        self._trigrams = {}
+        self._last_sync = 0.0
+        self._lock = threading.RLock()
+
+    def _remove(self, resource_name):
+        contact = self.contacts.pop(resource_name, None)
+        if contact is None:
+            return
+        for gram in self._grams.pop(resource_name, ()):
+            holders = self._trigrams.get(gram)
+            if holders is not None:
+                holders.discard(resource_name)
+                if not holders:
+                    del self._trigrams[gram]
+
+    def _apply(self, person):
+        resource_name = person["resourceName"]
+        self._remove(resource_name)
+        if person.get("metadata", {}).get("deleted"):
+            return
+        names = [
+            n.get("displayName")
+            for n in person.get("names", [])
+            if n.get("displayName")
+        ]
+        emails = [
+            e.get("value") for e in person.get("emailAddresses", []) if e.get("value")
+        ]
+        if not names or not emails:
+            return
+        keys = [normalize(name) for name in names] + [
+            _email_terms(normalize(email)) for email in emails
+        ]
+        words = {word: trigrams(word) for key in keys for word in key.split()}
+        grams = set().union(*words.values())
+        self.contacts[resource_name] = {
+            "name": names[0],
+            "emails": emails,
+            "keys": keys,
+            "words": words,
+            "addresses": [normalize(email) for email in emails],
+        }
+        self._grams[resource_name] = grams
+        for gram in grams:
+            self._trigrams.setdefault(gram, set()).add(resource_name)
+
+    def _list_all(self, service, **params):
+        page_token = None
+        while True:
+            response = (
+                service.people()
+                .connections()
+                .list(
+                    resourceName="people/me",
+                    pageSize=PAGE_SIZE,
+                    personFields=PERSON_FIELDS,
+                    requestSyncToken=True,
+                    pageToken=page_token,
+                    **params,
+                )
+                .execute()
+            )
+            for person in response.get("connections", []):
+                self._apply(person)
+            page_token = response.get("nextPageToken")
+            if not page_token:
+                return response.get("nextSyncToken")
+
+    def sync(self, service, force=False):
+        """
+        Brings the index up to date: a full listing the first time (or after
+        the sync token expired), otherwise one incremental call.
+        """
+        with self._lock:
+            if not force and time.monotonic() - self._last_sync < SYNC_INTERVAL_SECONDS:
+                return
+            if self.sync_token:
+                try:
+                    self.sync_token = self._list_all(service, syncToken=self.sync_token)
+                except HttpError as error:
+                    # Expired sync token (documented as 410, sometimes sent
+                    # as 400 FAILED_PRECONDITION): relist everything
+                    if error.resp.status not in (400, 410):
+                        raise
+                    self.sync_token = None
+            if not self.sync_token:
+                self.contacts = {}
+                self._grams = {}
+                self._trigrams = {}
+                self.sync_token = self._list_all(service)
+            self._last_sync = time.monotonic()
+
+    def record_change(self, person):
+        """
+        Applies a created or updated contact right away.
+        """
+        with self._lock:
+            self._apply(person)
+
+    def all(self):
+        with self._lock:
+            contacts = list(self.contacts.values())
+        return [{"name": c["name"], "email": c["emails"][0]} for c in contacts]
+
+    def _score(self, contact, terms, address, query_words):
+        if address in contact["addresses"] or terms in contact["keys"]:
+            return 1.0
+        # Every query word is ("alex" -> "alex wong") or starts ("al smi" ->
+        # "alex smith") some word of a key
+        best = 0.0
+        for key in contact["keys"]:
+            key_words = key.split()
+            if all(q in key_words for q in query_words):
+                return 0.95
+            if all(any(w.startswith(q) for w in key_words) for q in query_words):
+                best = 0.9
+        if best:
+            return best
+        # Otherwise average, over query words, the closest word by trigram overlap
+        words = contact["words"].values()
+        return sum(
+            max(_similarity(grams, word_grams) for word_grams in words)
+            for grams in query_words.values()
+        ) / len(query_words)
+
+    def lookup(self, query, top_k=5):
+        """
+        Returns up to top_k contacts best matching a name or email, best first.
+        """
+        query = normalize(query)
+        address = query if "@" in query else None
+        terms = _email_terms(query) if address else " ".join(query.split())
+        if not terms:
+            return []
+        query_words = {word: trigrams(word) for word in terms.split()}
+        with self._lock:
+            candidates = set()
+            for grams in query_words.values():
+                for gram in grams:
+                    candidates |= self._trigrams.get(gram, set())
+            scored = []
+            for resource_name in candidates:
+                contact = self.contacts[resource_name]
+                score = self._score(contact, terms, address, query_words)
+                if score >= MIN_SCORE:
+                    scored.append((score, contact))
+        best = heapq.nlargest(top_k, scored, key=lambda match: match[0])
+        matches = []
+        for score, contact in best:
+            match = {
+                "name": contact["name"],
+                "email": contact["emails"][0],
+                "score": round(score, 2),
+            }
+            if len(contact["emails"]) > 1:
+                match["other_emails"] = contact["emails"][1:]
+            matches.append(match)
+        return matches
+
+
+_contact_index = ContactIndex()
+
+
+def get_contact_index():
+    return _contact_index
+
+
+@on_account_reset
+def _reset_contact_index():
+    global _contact_index
+    _contact_index = ContactIndex()
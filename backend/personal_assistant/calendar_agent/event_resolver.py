@@ -0,0 +1,200 @@
+from personal_assistant.calendar_agent.event_store import parse_event_time
+from datetime import datetime, time, timedelta
+import re
+
+# Without a date hint, events in [now - LOOKBACK_DAYS, now + LOOKAHEAD_DAYS] are considered.
+LOOKBACK_DAYS = 1
+LOOKAHEAD_DAYS = 14
+# Candidates offered to the user when the description is ambiguous.
+MAX_CHOICES = 5
+# The best candidate wins outright only if it beats the runner-up by this much.
+WIN_MARGIN = 1.0
+
+WEEKDAYS = [
+    "monday",
+    "tuesday",
+    "wednesday",
+    "thursday",
+    "friday",
+    "saturday",
+    "sunday",
+]
+# Words that say nothing about which event is meant.
+STOPWORDS = set("""
+    a an the my our his her their this that next at on in for with to of and or
+    from about meeting meetings event events appointment invite invitation call
+    today tomorrow yesterday tonight am pm noon midnight o'clock
+    """.split())
+STOPWORDS |= set(WEEKDAYS) | {day[:3] for day in WEEKDAYS}
+
+_TIME_12H = re.compile(r"\b(\d{1,2})(?::(\d{2}))?\s*(am|pm)\b")
+_TIME_24H = re.compile(r"\b([01]?\d|2[0-3]):([0-5]\d)\b")
+_ISO_DATE = re.compile(r"\b(\d{4}-\d{2}-\d{2})\b")
+_WORD = re.compile(r"[\w@.'-]+")
+
+
+def _words(text):
+    # Whole words, so "afternoon" does not count as "noon"
+    return {word.strip(".'-") for word in _WORD.findall(text)}
+
+
+def parse_hints(text, now):
+    """
+    Pulls a time of day, a date and keywords out of a free-form description
+    such as "the 3pm sync with Adam tomorrow".
+
+    Args:
+        text (str): The description.
+        now (datetime): Aware current time in the user's timezone.
+
+    Returns:
+        dict: "time" (datetime.time or None), "date" (datetime.date or None)
+        and "keywords" (list of lowercase words).
+    """
+    text = text.lower()
+    hints = {"time": None, "date": None, "keywords": []}
+
+    match = _TIME_12H.search(text)
+    if match:
+        hour = int(match.group(1)) % 12 + (12 if match.group(3) == "pm" else 0)
+        hints["time"] = time(hour, int(match.group(2) or 0))
+        text = text[: match.start()] + " " + text[match.end() :]
+    else:
+        match = _TIME_24H.search(text)
+        if match:
+            hints["time"] = time(int(match.group(1)), int(match.group(2)))
+            text = text[: match.start()] + " " + text[match.end() :]
+        elif "noon" in _words(text):
+            hints["time"] = time(12)
+        elif "midnight" in _words(text):
+            hints["time"] = time(0)
+
+    today = now.date()
+    match = _ISO_DATE.search(text)
+    if match:
+        hints["date"] = datetime.strptime(match.group(1), "%Y-%m-%d").date()
+        text = text[: match.start()] + " " + text[match.end() :]
+    elif "tomorrow" in text:
+        hints["date"] = today + timedelta(days=1)
+    elif "yesterday" in text:
+        hints["date"] = today - timedelta(days=1)
+    elif "today" in text or "tonight" in text:
+        hints["date"] = today
+    else:
+        words = _words(text)
+        for i, day in enumerate(WEEKDAYS):
+            if day in words or day[:3] in words:
+                # The next occurrence, today included
+                hints["date"] = today + timedelta(days=(i - today.weekday()) % 7)
+                break
+
+    words = (word.strip(".'-") for word in _WORD.findall(text))
+    hints["keywords"] = [word for word in words if word and word not in STOPWORDS]
+    return hints
+
+
+def search_window(hints, now):
+    """
+    Returns the (start, end) range worth loading candidates from.
+    """
+    if hints["date"] is not None:
+        start = datetime.combine(hints["date"], time(), tzinfo=now.tzinfo)
+        return start, start + timedelta(days=1)
+    return now - timedelta(days=LOOKBACK_DAYS), now + timedelta(days=LOOKAHEAD_DAYS)
+
+
+def _haystack(event):
+    return " ".join(
+        [
+            event.get("summary", ""),
+            event.get("description", ""),
+            event.get("location", ""),
+        ]
+        + [
+            f"{a.get('email', '')} {a.get('displayName', '')}"
+            for a in event.get("attendees", [])
+        ]
+    ).lower()
+
+
+def score_event(event, hints, now):
+    """
+    Scores how well an event fits the hints; 0 means it matches none of them.
+    Keywords weigh up to 2, an exact time match 1 (0.5 within half an hour).
+    """
+    score = 0.0
+    if hints["keywords"]:
+        haystack = _haystack(event)
+        found = sum(1 for word in hints["keywords"] if word in haystack)
+        score += 2.0 * found / len(hints["keywords"])
+    start = parse_event_time(event.get("start"))
+    if hints["time"] is not None and "dateTime" in event.get("start", {}):
+        local = start.astimezone(now.tzinfo)
+        minutes = abs(
+            (local.hour * 60 + local.minute)
+            - (hints["time"].hour * 60 + hints["time"].minute)
+        )
+        if minutes == 0:
+            score += 1.0
+        elif minutes <= 30:
+            score += 0.5
+    if not hints["keywords"] and hints["time"] is None:
+        # Only a date was given: every event that day is a candidate
+        score = max(score, 0.1)
+    return score
+
+
+def describe(event, zone):
+    start = event.get("start", {})
+    if "dateTime" in start:
+        when = parse_event_time(start).astimezone(zone).strftime("%a %b %d, %H:%M")
+    else:
+        when = f"{start.get('date')} (all day)"
+    return f"{event.get('summary') or '(no title)'} - {when}"
+
+
+def resolve(events, hints, now):
+    """
+    Picks the event the hints describe.
+
+    Returns:
+        dict: {"status", "data", "question_to_user"} where status is SUCCESS
+        (data is the event id), NEEDS_USER_INPUT (data lists the candidates)
+        or NOT_FOUND.
+    """
+    scored = []
+    for event in events:
+        score = score_event(event, hints, now)
+        if score > 0:
+            start = parse_event_time(event.get("start"))
+            # Among equal scores prefer the event closest to now
+            scored.append((-score, abs((start - now).total_seconds()), event))
+    scored.sort(key=lambda item: item[:2])
+
+    if not scored:
+        return {
+            "status": "NOT_FOUND",
+            "data": None,
+            "question_to_user": "I couldn't find an event matching that description. "
+            "Would you like to create a new one?",
+        }
+    best = -scored[0][0]
+    if len(scored) == 1 or best - (-scored[1][0]) >= WIN_MARGIN:
+        return {
+            "status": "SUCCESS",
+            "data": scored[0][2]["id"],
+            "question_to_user": None,
+        }
+
+    choices = [event for _, _, event in scored[:MAX_CHOICES]]
+    options = "; ".join(
+        f"{i}) {describe(event, now.tzinfo)}" for i, event in enumerate(choices, 1)
+    )
+    return {
+        "status": "NEEDS_USER_INPUT",
+        "data": [
+            {"id": event["id"], "description": describe(event, now.tzinfo)}
+            for event in choices
+        ],
+        "question_to_user": f"Which event do you mean? {options}",
+    }
@@ -0,0 +1,249 @@
+from googleapiclient.errors import HttpError
+from personal_assistant.common.tool_utils import on_account_reset
+from datetime import datetime, timezone
+from itertools import islice
+import heapq
+import threading
+import time
+
+# Reads within this many seconds of the last sync are answered without any
+# API call; after that one incremental (syncToken) call brings the store up to date.
+SYNC_INTERVAL_SECONDS = 30
+PAGE_SIZE = 2500
+# The user's list of calendars rarely changes; it is re-read at most this often.
+CALENDAR_LIST_TTL_SECONDS = 3600
+
+
+def parse_event_time(value):
+    """
+    Parses an event start/end ({"dateTime": ...} or {"date": ...}) or an
+    RFC3339 string into an aware datetime.
+    """
+    if isinstance(value, dict):
+        value = value.get("dateTime") or value.get("date")
+    if not value:
+        return None
+    if "T" not in value:
+        return datetime.strptime(value, "%Y-%m-%d").replace(tzinfo=timezone.utc)
+    moment = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment
+
+
+def _matches_keyword(event, keyword):
+    """
+    Case-insensitive match on the same fields the Calendar API's q searches.
+    """
+    haystack = " ".join(
+        [
+            event.get("summary", ""),
+            event.get("description", ""),
+            event.get("location", ""),
+            event.get("organizer", {}).get("email", ""),
+            event.get("organizer", {}).get("displayName", ""),
+        ]
+        + [
+            f"{a.get('email', '')} {a.get('displayName', '')}"
+            for a in event.get("attendees", [])
+        ]
+    ).lower()
+    return all(term in haystack for term in keyword.lower().split())
+
+
+def iter_events(service, calendar_id="primary", page_size=PAGE_SIZE, **params):
+    """
+    Yields events from events.list one page at a time, following
+    nextPageToken, so only a single page is held in memory and the caller
+    can stop early. The generator's return value is the nextSyncToken of the
+    last page, if the API sent one.
+
+    Args:
+        service: Calendar API service.
+        calendar_id (str): Calendar to list.
+        page_size (int): maxResults per page.
+        **params: Extra events.list parameters (timeMin, timeMax, q, orderBy, fields, ...).
+    """
+    page_token = None
+    while True:
+        response = (
+            service.events()
+            .list(
+                calendarId=calendar_id,
+                singleEvents=True,
+                maxResults=page_size,
+                pageToken=page_token,
+                **params,
+            )
+            .execute()
+        )
+        yield from response.get("items", [])
+        page_token = response.get("nextPageToken")
+        if not page_token:
+            return response.get("nextSyncToken")
+
+
+class EventStore:
+    """
+    Local copy of one calendar's events. A full sync fills it once; after
+    that events.list with the stored syncToken returns only what changed.
+    """
+
+    def __init__(self, calendar_id):
+        self.calendar_id = calendar_id
+        self.events = {}
+        self.sync_token = None
+        self._last_sync = 0.0
+        self._lock = threading.RLock()
+
+    def _apply(self, event):
+        if event.get("status") == "cancelled":
+            self.events.pop(event["id"], None)
+        else:
+            self.events[event["id"]] = event
+
+    def _list_all(self, service, **params):
+        pages = iter_events(service, self.calendar_id, **params)
+        while True:
+            try:
+                self._apply(next(pages))
+            except StopIteration as done:
+                return done.value
+
+    def sync(self, service, force=False):
+        """
+        Brings the store up to date: a full sync the first time (or after the
+        sync token expired), otherwise one incremental call.
+        """
+        with self._lock:
+            if not force and time.monotonic() - self._last_sync < SYNC_INTERVAL_SECONDS:
+                return
+            if self.sync_token:
+                try:
+                    self.sync_token = self._list_all(
+                        service, syncToken=self.sync_token, showDeleted=True
+                    )
+                except HttpError as error:
+                    # 410 Gone: the sync token is no longer valid, resync from scratch
+                    if error.resp.status != 410:
+                        raise
+                    self.sync_token = None
+            if not self.sync_token:
+                self.events = {}
+                self.sync_token = self._list_all(service)
+            self._last_sync = time.monotonic()
+
+    def record_change(self, event):
+        """
+        Applies the result of a mutation right away and makes the next read
+        pull a delta to pick up server-side side effects.
+        """
+        with self._lock:
+            self._apply(event)
+            self._last_sync = 0.0
+
+    def get(self, event_id):
+        with self._lock:
+            return self.events.get(event_id)
+
+    def iter_query(self, time_min=None, time_max=None, keyword=None):
+        """
+        Yields events overlapping [time_min, time_max) that match keyword,
+        ordered by start time.
+        """
+        with self._lock:
+            events = list(self.events.values())
+        matches = []
+        for event in events:
+            start = parse_event_time(event.get("start"))
+            end = parse_event_time(event.get("end")) or start
+            if start is None:
+                continue
+            if time_min is not None and end <= time_min:
+                continue
+            if time_max is not None and start >= time_max:
+                continue
+            if keyword and not _matches_keyword(event, keyword):
+                continue
+            matches.append((start, event["id"], event))
+        heapq.heapify(matches)
+        while matches:
+            yield heapq.heappop(matches)[2]
+
+    def query(self, time_min=None, time_max=None, keyword=None, max_results=None):
+        """
+        Returns the first max_results events from iter_query.
+        """
+        return list(islice(self.iter_query(time_min, time_max, keyword), max_results))
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_event_store(calendar_id="primary"):
+    """
+    Returns the process-wide event store for a calendar.
+    """
+    with _stores_lock:
+        store = _stores.get(calendar_id)
+        if store is None:
+            store = EventStore(calendar_id)
+            _stores[calendar_id] = store
+        return store
+
+
+_calendar_list = None
+_calendar_list_time = 0.0
+_calendar_list_lock = threading.Lock()
+
+
+def list_calendars(service, force=False):
+    """
+    Returns the user's calendars as {"id", "summary", "primary", "selected",
+    "access_role"} dicts, cached for CALENDAR_LIST_TTL_SECONDS.
+    """
+    global _calendar_list, _calendar_list_time
+    with _calendar_list_lock:
+        if (
+            not force
+            and _calendar_list is not None
+            and time.monotonic() - _calendar_list_time < CALENDAR_LIST_TTL_SECONDS
+        ):
+            return _calendar_list
+        calendars = []
+        page_token = None
+        while True:
+            response = (
+                service.calendarList()
+                .list(
+                    pageToken=page_token,
+                    fields="nextPageToken,items(id,summary,primary,selected,accessRole)",
+                )
+                .execute()
+            )
+            for entry in response.get("items", []):
+                calendars.append(
+                    {
+                        "id": entry["id"],
+                        "summary": entry.get("summary"),
+                        "primary": entry.get("primary", False),
+                        "selected": entry.get("selected", False),
+                        "access_role": entry.get("accessRole"),
+                    }
+                )
+            page_token = response.get("nextPageToken")
+            if not page_token:
+                break
+        _calendar_list = calendars
+        _calendar_list_time = time.monotonic()
+        return calendars
+
+
+@on_account_reset
+def _reset_calendar_state():
+    global _calendar_list
+    with _stores_lock:
+        _stores.clear()
+    with _calendar_list_lock:
+        _calendar_list = None
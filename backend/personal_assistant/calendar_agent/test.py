@@ -1,4 +1,6 @@
 from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+import event_resolver
 import tool
 
 if __name__ == "__main__":
@@ -21,10 +23,11 @@ if __name__ == "__main__":
     # 2. Invite attendees (if event creation was successful)
     if isinstance(created_event, dict) and "id" in created_event:
         attendee_emails = ["wenhaos0225@gmail.com", "wenhaos@umich.edu"]
-        for email in attendee_emails:
-            print(f"Inviting attendee {email} to event...")
-            invite_result = tool.invite_attendee_to_event(created_event["id"], email)
-            print(f"Invite result for {email}:", invite_result)
+        print(f"Inviting attendees {attendee_emails} to event...")
+        invite_result = tool.invite_attendee_to_event(
+            created_event["id"], attendee_emails
+        )
+        print("Invite result:", invite_result)
 
         # 3. Respond to the event as an attendee
         test_email = attendee_emails[0]
@@ -59,3 +62,28 @@ if __name__ == "__main__":
     print("Getting contact list...")
     contact_list = tool.get_contact_info()
     print("Contact list:", contact_list)
+
+    # 8. Look up a contact by (part of) their name
+    print("Looking up contact 'Wenhao'...")
+    print("Matches:", tool.lookup_contact("Wenhao"))
+
+    # 9. Resolve a description offline: "afternoon" must not read as "noon"
+    print("Resolving 'the meeting this afternoon' against sample events...")
+    local_now = datetime(2026, 10, 19, 9, 0, tzinfo=ZoneInfo("UTC"))
+    sample_events = [
+        {
+            "id": "lunch",
+            "summary": "Lunch",
+            "start": {"dateTime": "2026-10-19T12:00:00Z"},
+        },
+        {
+            "id": "review",
+            "summary": "Design review",
+            "start": {"dateTime": "2026-10-19T15:00:00Z"},
+        },
+    ]
+    hints = event_resolver.parse_hints("the meeting this afternoon", local_now)
+    assert hints["time"] is None, hints
+    resolved = event_resolver.resolve(sample_events, hints, local_now)
+    assert resolved["data"] != "lunch", resolved
+    print("Resolve result:", resolved)
@@ -1,9 +1,41 @@
 from googleapiclient.errors import HttpError
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from personal_assistant.common.tool_utils import get_google_service
-import os
-import json
-from typing import Optional
+from itertools import chain, islice
+from personal_assistant.common.tool_utils import get_google_service, get_user_email
+from personal_assistant.calendar_agent.event_store import (
+    PAGE_SIZE,
+    get_event_store,
+    iter_events,
+    list_calendars,
+    parse_event_time,
+)
+from personal_assistant.calendar_agent.contact_index import (
+    PERSON_FIELDS,
+    get_contact_index,
+)
+from personal_assistant.calendar_agent.event_resolver import (
+    parse_hints,
+    resolve,
+    search_window,
+)
+from personal_assistant.calendar_agent.availability import (
+    find_slots,
+    merge_intervals,
+)
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+import heapq
+from typing import List, Optional
+
+# Upper bound on calendars queried at the same time by a multi-calendar search.
+MAX_CALENDAR_WORKERS = 8
+# A bounded range longer than this, on a calendar whose event store has not
+# been filled yet, is paged through directly rather than mirroring the whole
+# (possibly busy, shared) calendar first.
+STREAM_RANGE_DAYS = 28
+# Calls per batch HTTP request for bulk add/cancel; the API allows up to 1000
+# but large batches are more likely to be rate limited as a whole.
+BATCH_SIZE = 50
 
 
 def get_calendar_service():
@@ -14,6 +46,135 @@ def get_people_service():
     return get_google_service(service_name="people", version="v1")
 
 
+# Partial response for streamed events.list pages: only what _event_info reads.
+EVENT_FIELDS = (
+    "nextPageToken,items(id,summary,description,start,end,location,"
+    "attendees,status,creator,organizer)"
+)
+
+
+def _to_bound(value, end=False):
+    if not value:
+        return None
+    if "T" not in value:
+        value += "T23:59:59Z" if end else "T00:00:00Z"
+    return value
+
+
+def _calendar_events(
+    service, calendar_id, time_min, time_max, keyword, from_store, page_size
+):
+    """
+    Returns one calendar's raw events ordered by start time. The blocking
+    part (store sync or first page) happens here so it can run on a worker.
+    from_store=None picks the source: see STREAM_RANGE_DAYS.
+    """
+    if from_store is None:
+        from_store = (
+            get_event_store(calendar_id).sync_token is not None
+            or not time_min
+            or not time_max
+            or parse_event_time(time_max) - parse_event_time(time_min)
+            <= timedelta(days=STREAM_RANGE_DAYS)
+        )
+    if from_store:
+        # Answered from the local event store; at most one incremental sync call
+        store = get_event_store(calendar_id)
+        store.sync(service)
+        return store.iter_query(
+            time_min=parse_event_time(time_min),
+            time_max=parse_event_time(time_max),
+            keyword=keyword,
+        )
+    params = {"orderBy": "startTime", "fields": EVENT_FIELDS}
+    if time_min:
+        params["timeMin"] = time_min
+    if time_max:
+        params["timeMax"] = time_max
+    if keyword:
+        params["q"] = keyword
+    events = iter_events(service, calendar_id, page_size=page_size, **params)
+    first = next(events, None)
+    return iter(()) if first is None else chain([first], events)
+
+
+def _tag(calendar_id, events):
+    for event in events:
+        yield calendar_id, event
+
+
+def stream_events(
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    keyword: Optional[str] = None,
+    timezone: Optional[str] = None,
+    calendar_id: str = "primary",
+    calendar_ids: Optional[List[str]] = None,
+    from_store: Optional[bool] = None,
+    page_size: int = PAGE_SIZE,
+):
+    """
+    Yields compact event records (see _event_info) ordered by start time,
+    without a result cap; stop iterating once you have enough.
+
+    Args:
+        start_date, end_date, keyword, timezone, calendar_id: As for get_events.
+        calendar_ids (list, optional): Several calendars to query concurrently
+            and merge by start time; each record then carries its "calendar".
+        from_store (bool, optional): True serves from the local event store;
+            False pages through events.list for just this range instead, e.g.
+            for a one-off scan of a large shared calendar. By default long
+            ranges on calendars without a synced store are paged through and
+            everything else comes from the store.
+        page_size (int): events.list page size when paging; callers that
+            stop after N events should pass about N so no more is downloaded.
+    """
+    page_size = max(1, min(page_size, PAGE_SIZE))
+    service = get_calendar_service()
+    time_min = _to_bound(start_date)
+    time_max = _to_bound(end_date, end=True)
+    if not calendar_ids:
+        for event in _calendar_events(
+            service, calendar_id, time_min, time_max, keyword, from_store, page_size
+        ):
+            yield _event_info(event, timezone)
+        return
+
+    calendar_ids = list(dict.fromkeys(calendar_ids))
+    with ThreadPoolExecutor(
+        max_workers=min(MAX_CALENDAR_WORKERS, len(calendar_ids))
+    ) as executor:
+        streams = list(
+            executor.map(
+                lambda cid: _calendar_events(
+                    service, cid, time_min, time_max, keyword, from_store, page_size
+                ),
+                calendar_ids,
+            )
+        )
+    # k-way merge: each per-calendar stream is already ordered by start
+    merged = heapq.merge(
+        *[_tag(cid, events) for cid, events in zip(calendar_ids, streams)],
+        key=lambda item: parse_event_time(item[1].get("start")),
+    )
+    for cid, event in merged:
+        yield {**_event_info(event, timezone), "calendar": cid}
+
+
+def get_calendars() -> list:
+    """
+    Lists the calendars the user can see (own, team and shared).
+
+    Returns:
+        list: Calendars with id, summary, primary, selected (shown in the
+        user's calendar UI) and access_role.
+    """
+    try:
+        return list_calendars(get_calendar_service())
+    except HttpError as error:
+        return f"An error occurred: {error}"
+
+
 def get_events(
     start_date: Optional[str] = None,
     end_date: Optional[str] = None,
@@ -21,6 +182,8 @@ def get_events(
     timezone: Optional[str] = None,
     calendar_id: str = "primary",
     max_results: int = 10,
+    calendar_ids: Optional[List[str]] = None,
+    all_calendars: bool = False,
 ) -> list:
     """
     Fetches events from the user's calendar with optional filters for date range, keyword, and timezone.
@@ -32,58 +195,307 @@ def get_events(
         timezone (str, optional): Timezone for the query (default 'UTC').
         calendar_id (str, optional): Calendar ID (default 'primary').
         max_results (int, optional): Maximum number of events to return.
+        calendar_ids (list, optional): Search these calendars together instead of calendar_id.
+        all_calendars (bool, optional): Search every calendar shown in the user's calendar UI.
     Returns:
-        list: List of event dicts with details.
+        list: List of event dicts with details, ordered by start time. When
+        several calendars are searched each event has a "calendar" field.
     """
     try:
-        service = get_calendar_service()
-        time_min = None
-        time_max = None
-        if start_date:
-            if "T" in start_date:
-                time_min = start_date
-            else:
-                time_min = start_date + "T00:00:00Z"
-        if end_date:
-            if "T" in end_date:
-                time_max = end_date
-            else:
-                time_max = end_date + "T23:59:59Z"
-        events_result = (
-            service.events()
-            .list(
-                calendarId=calendar_id,
-                timeMin=time_min,
-                timeMax=time_max,
-                maxResults=max_results,
-                singleEvents=True,
-                orderBy="startTime",
-                q=keyword,
-                timeZone=timezone,
+        if all_calendars:
+            calendar_ids = [
+                calendar["id"]
+                for calendar in list_calendars(get_calendar_service())
+                if calendar["selected"] or calendar["primary"]
+            ]
+        return list(
+            islice(
+                stream_events(
+                    start_date,
+                    end_date,
+                    keyword,
+                    timezone,
+                    calendar_id,
+                    calendar_ids=calendar_ids,
+                    # Each calendar contributes at most max_results events
+                    page_size=max_results,
+                ),
+                max_results,
             )
-            .execute()
         )
-        events = events_result.get("items", [])
-        output = []
-        for event in events:
-            event_info = {
-                "id": event.get("id"),
-                "summary": event.get("summary"),
-                "description": event.get("description"),
-                "start": event.get("start"),
-                "end": event.get("end"),
-                "location": event.get("location"),
-                "attendees": event.get("attendees", []),
-                "status": event.get("status"),
-                "creator": event.get("creator"),
-                "organizer": event.get("organizer"),
-            }
-            output.append(event_info)
-        return output
     except HttpError as error:
         return f"An error occurred: {error}"
 
 
+def _localize(when, timezone):
+    """
+    Expresses an event start/end in the given timezone, like the API's timeZone parameter.
+    """
+    if not timezone or not when or "dateTime" not in when:
+        return when
+    try:
+        zone = ZoneInfo(timezone)
+    except (ZoneInfoNotFoundError, ValueError):
+        return when
+    return {
+        **when,
+        "dateTime": parse_event_time(when).astimezone(zone).isoformat(),
+        "timeZone": timezone,
+    }
+
+
+def _event_info(event, timezone=None):
+    return {
+        "id": event.get("id"),
+        "summary": event.get("summary"),
+        "description": event.get("description"),
+        "start": _localize(event.get("start"), timezone),
+        "end": _localize(event.get("end"), timezone),
+        "location": event.get("location"),
+        "attendees": event.get("attendees", []),
+        "status": event.get("status"),
+        "creator": event.get("creator"),
+        "organizer": event.get("organizer"),
+    }
+
+
+def resolve_event(
+    description: str, timezone: str = "UTC", calendar_id: str = "primary"
+) -> dict:
+    """
+    Finds the single event the user is referring to, e.g. "the 3pm meeting",
+    "our weekly sync tomorrow" or "lunch with Adam on Friday".
+
+    Args:
+        description (str): Everything the user said about the event (title words, people, date, time).
+        timezone (str, optional): The user's timezone, used to read times and dates (default 'UTC').
+        calendar_id (str, optional): Calendar ID (default 'primary').
+    Returns:
+        dict: {"status", "data", "question_to_user"}. SUCCESS puts the event
+        ID in data; NEEDS_USER_INPUT lists the candidate events (id and
+        description) in data and asks which one; NOT_FOUND asks whether to
+        create a new event.
+    """
+    try:
+        zone = ZoneInfo(timezone)
+    except (ZoneInfoNotFoundError, ValueError):
+        return f"Unknown timezone: {timezone}"
+    try:
+        now = datetime.now(zone)
+        hints = parse_hints(description, now)
+        time_min, time_max = search_window(hints, now)
+        store = get_event_store(calendar_id)
+        store.sync(get_calendar_service())
+        return resolve(store.iter_query(time_min, time_max), hints, now)
+    except HttpError as error:
+        return f"An error occurred: {error}"
+
+
+def _parse_bound(value, zone, end=False):
+    """
+    Parses a YYYY-MM-DD date (local midnight in zone; the following midnight
+    when end is set) or an RFC3339 timestamp into an aware datetime.
+    """
+    if "T" not in value:
+        day = datetime.strptime(value, "%Y-%m-%d").date()
+        if end:
+            day += timedelta(days=1)
+        return datetime.combine(day, datetime.min.time(), tzinfo=zone)
+    moment = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=zone)
+    return moment
+
+
+def _query_busy(service, time_min, time_max, calendars, timezone):
+    """
+    Runs a single freebusy.query for all calendars.
+
+    Returns:
+        tuple: ({calendar: [(start, end), ...]}, {calendar: reason}) where the
+        second map lists calendars whose free/busy could not be read.
+    """
+    response = (
+        service.freebusy()
+        .query(
+            body={
+                "timeMin": time_min.isoformat(),
+                "timeMax": time_max.isoformat(),
+                "timeZone": timezone,
+                "items": [{"id": calendar} for calendar in calendars],
+            }
+        )
+        .execute()
+    )
+    busy = {}
+    unavailable = {}
+    for calendar, info in response.get("calendars", {}).items():
+        if info.get("errors"):
+            unavailable[calendar] = info["errors"][0].get("reason", "unknown")
+            continue
+        busy[calendar] = [
+            (parse_event_time(period["start"]), parse_event_time(period["end"]))
+            for period in info.get("busy", [])
+        ]
+    return busy, unavailable
+
+
+def check_availability(
+    start: str,
+    end: str,
+    attendees: Optional[List[str]] = None,
+    timezone: str = "UTC",
+    calendar_id: str = "primary",
+) -> dict:
+    """
+    Checks whether the user and the given attendees are free for a time range.
+
+    Args:
+        start (str): Start of the range (RFC3339 timestamp or YYYY-MM-DD).
+        end (str): End of the range (RFC3339 timestamp or YYYY-MM-DD).
+        attendees (list, optional): Attendee email addresses to check as well.
+        timezone (str, optional): Timezone for dates without an offset (default 'UTC').
+        calendar_id (str, optional): The user's calendar ID (default 'primary').
+    Returns:
+        dict: "available" (bool), the busy periods that overlap the range per
+        calendar under "conflicts", and calendars that could not be checked
+        under "unavailable".
+    """
+    try:
+        zone = ZoneInfo(timezone)
+    except (ZoneInfoNotFoundError, ValueError):
+        return f"Unknown timezone: {timezone}"
+    try:
+        service = get_calendar_service()
+        time_min = _parse_bound(start, zone)
+        time_max = _parse_bound(end, zone, end=True)
+        calendars = [calendar_id] + [a for a in attendees or [] if a != calendar_id]
+        busy, unavailable = _query_busy(
+            service, time_min, time_max, calendars, timezone
+        )
+        conflicts = {
+            calendar: [
+                {
+                    "start": period_start.astimezone(zone).isoformat(),
+                    "end": period_end.astimezone(zone).isoformat(),
+                }
+                for period_start, period_end in merge_intervals(periods)
+            ]
+            for calendar, periods in busy.items()
+            if periods
+        }
+        return {
+            "available": not conflicts,
+            "conflicts": conflicts,
+            "unavailable": unavailable,
+        }
+    except (HttpError, ValueError) as error:
+        return f"An error occurred: {error}"
+
+
+def find_free_slots(
+    start_date: str,
+    end_date: str,
+    duration_minutes: int = 30,
+    attendees: Optional[List[str]] = None,
+    working_hours_start: str = "09:00",
+    working_hours_end: str = "17:00",
+    include_weekends: bool = False,
+    timezone: str = "UTC",
+    max_slots: int = 5,
+    calendar_id: str = "primary",
+) -> dict:
+    """
+    Finds time slots when the user and all given attendees are free.
+
+    Args:
+        start_date (str): Start of the search (YYYY-MM-DD or RFC3339 timestamp).
+        end_date (str): End of the search, inclusive for dates (YYYY-MM-DD or RFC3339 timestamp).
+        duration_minutes (int, optional): Required meeting length (default 30).
+        attendees (list, optional): Attendee email addresses who must also be free.
+        working_hours_start (str, optional): Earliest slot start, HH:MM (default '09:00').
+        working_hours_end (str, optional): Latest slot end, HH:MM (default '17:00').
+        include_weekends (bool, optional): Whether Saturdays and Sundays count (default False).
+        timezone (str, optional): Timezone of the working hours and results (default 'UTC').
+        max_slots (int, optional): Maximum number of slots to return (default 5).
+        calendar_id (str, optional): The user's calendar ID (default 'primary').
+    Returns:
+        dict: "slots" as a list of {"start", "end"} RFC3339 pairs, earliest
+        first, and calendars that could not be checked under "unavailable".
+    """
+    try:
+        zone = ZoneInfo(timezone)
+    except (ZoneInfoNotFoundError, ValueError):
+        return f"Unknown timezone: {timezone}"
+    try:
+        service = get_calendar_service()
+        time_min = _parse_bound(start_date, zone)
+        time_max = _parse_bound(end_date, zone, end=True)
+        day_start = datetime.strptime(working_hours_start, "%H:%M").time()
+        day_end = datetime.strptime(working_hours_end, "%H:%M").time()
+        calendars = [calendar_id] + [a for a in attendees or [] if a != calendar_id]
+        busy, unavailable = _query_busy(
+            service, time_min, time_max, calendars, timezone
+        )
+        merged = merge_intervals(
+            period for periods in busy.values() for period in periods
+        )
+        slots = find_slots(
+            merged,
+            time_min,
+            time_max,
+            timedelta(minutes=duration_minutes),
+            zone,
+            day_start=day_start,
+            day_end=day_end,
+            weekends=include_weekends,
+            max_slots=max_slots,
+        )
+        return {
+            "slots": [
+                {"start": slot_start.isoformat(), "end": slot_end.isoformat()}
+                for slot_start, slot_end in slots
+            ],
+            "unavailable": unavailable,
+        }
+    except (HttpError, ValueError) as error:
+        return f"An error occurred: {error}"
+
+
+def _event_body(summary, start, end, description=None, location=None, timezone="UTC"):
+    event = {
+        "summary": summary,
+        "start": {"dateTime": start, "timeZone": timezone},
+        "end": {"dateTime": end, "timeZone": timezone},
+    }
+    if description:
+        event["description"] = description
+    if location:
+        event["location"] = location
+    return event
+
+
+def _execute_batch(service, requests):
+    """
+    Sends (request_id, request) pairs as Calendar batch HTTP requests of up
+    to BATCH_SIZE calls each.
+
+    Returns:
+        dict: request_id -> (response, exception); one of the two is None.
+    """
+    results = {}
+
+    def callback(request_id, response, exception):
+        results[request_id] = (response, exception)
+
+    for start in range(0, len(requests), BATCH_SIZE):
+        batch = service.new_batch_http_request(callback=callback)
+        for request_id, request in requests[start : start + BATCH_SIZE]:
+            batch.add(request, request_id=request_id)
+        batch.execute()
+    return results
+
+
 def add_event(
     summary: str,
     start: str,
@@ -110,24 +522,80 @@ def add_event(
     """
     try:
         service = get_calendar_service()
-        event = {
-            "summary": summary,
-            "start": {"dateTime": start, "timeZone": timezone},
-            "end": {"dateTime": end, "timeZone": timezone},
-        }
-        if description:
-            event["description"] = description
-        if location:
-            event["location"] = location
-
+        event = _event_body(summary, start, end, description, location, timezone)
         created_event = (
             service.events().insert(calendarId=calendar_id, body=event).execute()
         )
+        get_event_store(calendar_id).record_change(created_event)
         return created_event
     except HttpError as error:
         return f"An error occurred: {error}"
 
 
+def add_events(
+    events: List[dict], timezone: str = "UTC", calendar_id: str = "primary"
+) -> list:
+    """
+    Adds several events to the user's calendar in one batch request.
+
+    Args:
+        events (list): Events to create, each a dict with "summary", "start"
+            and "end" (RFC3339) and optionally "description", "location" and
+            "timezone".
+        timezone (str, optional): Timezone for events that do not set one (default 'UTC')
+        calendar_id (str, optional): Calendar ID (default 'primary')
+
+    Returns:
+        list: One result per input event, in order: {"index", "status":
+        "created", "id", "summary", "start"} or {"index", "status": "error", "error"}.
+    """
+    results = [None] * len(events)
+    requests = []
+    try:
+        service = get_calendar_service()
+        for index, item in enumerate(events):
+            missing = [key for key in ("summary", "start", "end") if not item.get(key)]
+            if missing:
+                results[index] = {
+                    "index": index,
+                    "status": "error",
+                    "error": f"Missing {', '.join(missing)}",
+                }
+                continue
+            body = _event_body(
+                item["summary"],
+                item["start"],
+                item["end"],
+                item.get("description"),
+                item.get("location"),
+                item.get("timezone") or timezone,
+            )
+            requests.append(
+                (str(index), service.events().insert(calendarId=calendar_id, body=body))
+            )
+        store = get_event_store(calendar_id)
+        for request_id, (created, error) in _execute_batch(service, requests).items():
+            index = int(request_id)
+            if error is not None:
+                results[index] = {
+                    "index": index,
+                    "status": "error",
+                    "error": str(error),
+                }
+                continue
+            store.record_change(created)
+            results[index] = {
+                "index": index,
+                "status": "created",
+                "id": created["id"],
+                "summary": created.get("summary"),
+                "start": created.get("start"),
+            }
+        return results
+    except HttpError as error:
+        return f"An error occurred: {error}"
+
+
 def cancel_event(event_id: str, calendar_id: str = "primary"):
     """
     Cancels (deletes) an event from the user's calendar by event ID.
@@ -140,36 +608,145 @@ def cancel_event(event_id: str, calendar_id: str = "primary"):
     try:
         service = get_calendar_service()
         service.events().delete(calendarId=calendar_id, eventId=event_id).execute()
+        get_event_store(calendar_id).record_change(
+            {"id": event_id, "status": "cancelled"}
+        )
         return {"status": "cancelled", "event_id": event_id}
     except HttpError as error:
         return f"An error occurred: {error}"
 
 
+def cancel_events(event_ids: List[str], calendar_id: str = "primary") -> list:
+    """
+    Cancels (deletes) several events from the user's calendar in one batch request.
+    Args:
+        event_ids (list): The event IDs to cancel.
+        calendar_id (str, optional): Calendar ID (default 'primary').
+    Returns:
+        list: One {"event_id", "status": "cancelled"} or {"event_id",
+        "status": "error", "error"} per distinct event ID, in order.
+    """
+    event_ids = list(dict.fromkeys(event_ids))
+    try:
+        service = get_calendar_service()
+        requests = [
+            (
+                event_id,
+                service.events().delete(calendarId=calendar_id, eventId=event_id),
+            )
+            for event_id in event_ids
+        ]
+        outcomes = _execute_batch(service, requests)
+        store = get_event_store(calendar_id)
+        results = []
+        for event_id in event_ids:
+            _, error = outcomes[event_id]
+            # 410 Gone: already deleted, which is what was asked for
+            if error is None or (
+                isinstance(error, HttpError) and error.resp.status == 410
+            ):
+                store.record_change({"id": event_id, "status": "cancelled"})
+                results.append({"event_id": event_id, "status": "cancelled"})
+            else:
+                results.append(
+                    {"event_id": event_id, "status": "error", "error": str(error)}
+                )
+        return results
+    except HttpError as error:
+        return f"An error occurred: {error}"
+
+
+def _cached_event(service, event_id, calendar_id):
+    """
+    Returns an event from the local store, syncing once if it is not there
+    yet and only falling back to events.get as a last resort.
+    """
+    store = get_event_store(calendar_id)
+    event = store.get(event_id)
+    if event is None:
+        store.sync(service)
+        event = store.get(event_id)
+    if event is None:
+        event = service.events().get(calendarId=calendar_id, eventId=event_id).execute()
+    return event
+
+
+def _merge_attendees(event, emails):
+    """
+    Returns the event's attendees plus any of emails not already on it, or
+    None if every address was already invited.
+    """
+    attendees = list(event.get("attendees", []))
+    invited = {att.get("email", "").lower() for att in attendees}
+    for email in emails:
+        if email.lower() not in invited:
+            attendees.append({"email": email})
+            invited.add(email.lower())
+    if len(attendees) == len(event.get("attendees", [])):
+        return None
+    return attendees
+
+
+def _patch_attendees(service, calendar_id, event_id, event, build_attendees):
+    """
+    Replaces the event's attendee list with build_attendees(event), as a
+    conditional update on the copy's etag. If the event changed since (412),
+    it is refetched and the list rebuilt once. Returns the updated event, or
+    None when build_attendees returns None (nothing to change).
+    """
+    for attempt in range(2):
+        attendees = build_attendees(event)
+        if attendees is None:
+            return None
+        # Only the attendee list is sent; the API replaces arrays as a whole
+        request = service.events().patch(
+            calendarId=calendar_id,
+            eventId=event_id,
+            body={"attendees": attendees},
+            sendUpdates="all",
+        )
+        # Conditional update: fails with 412 if the event changed since the
+        # copy was taken, instead of overwriting that change
+        if event.get("etag"):
+            request.headers["If-Match"] = event["etag"]
+        try:
+            updated_event = request.execute()
+        except HttpError as error:
+            if error.resp.status != 412 or attempt:
+                raise
+            event = (
+                service.events().get(calendarId=calendar_id, eventId=event_id).execute()
+            )
+            get_event_store(calendar_id).record_change(event)
+            continue
+        get_event_store(calendar_id).record_change(updated_event)
+        return updated_event
+
+
 def invite_attendee_to_event(
-    event_id: str, attendee_email: str, calendar_id: str = "primary"
+    event_id: str, attendee_emails: List[str], calendar_id: str = "primary"
 ):
     """
-    Invites an attendee (by email) to an existing event.
+    Invites one or more attendees (by email) to an existing event in a single update.
     Args:
         event_id (str): The event ID.
-        attendee_email (str): The email address to invite.
+        attendee_emails (list): The email addresses to invite.
         calendar_id (str, optional): Calendar ID (default 'primary').
     Returns:
         dict: The updated event object or error message.
     """
     try:
         service = get_calendar_service()
-        event = service.events().get(calendarId=calendar_id, eventId=event_id).execute()
-        attendees = event.get("attendees", [])
-        attendees.append({"email": attendee_email})
-        event["attendees"] = attendees
-        updated_event = (
-            service.events()
-            .update(
-                calendarId=calendar_id, eventId=event_id, body=event, sendUpdates="all"
-            )
-            .execute()
+        event = _cached_event(service, event_id, calendar_id)
+        updated_event = _patch_attendees(
+            service,
+            calendar_id,
+            event_id,
+            event,
+            lambda current: _merge_attendees(current, attendee_emails),
         )
+        if updated_event is None:
+            return "All of these attendees are already invited."
         return updated_event
     except HttpError as error:
         return f"An error occurred: {error}"
@@ -187,42 +764,25 @@ def respond_to_event(event_id: str, response: str, calendar_id: str = "primary")
     """
     try:
         service = get_calendar_service()
-        event = service.events().get(calendarId=calendar_id, eventId=event_id).execute()
-        attendees = event.get("attendees", [])
-        # Try to get the user's email from token.json
-        user_email = None
-        token_path = os.path.join(os.path.dirname(__file__), "../token.json")
-        if os.path.exists(token_path):
-            with open(token_path, "r") as f:
-                token_data = json.load(f)
-                user_email = token_data.get("token_response", {}).get(
-                    "email"
-                ) or token_data.get("email")
-        if not user_email:
-            # fallback: try to get from attendees
-            for att in attendees:
-                if att.get("self"):
-                    user_email = att.get("email")
-                    break
-        if not user_email:
-            return "Could not determine user email for RSVP."
-        updated = False
-        for att in attendees:
-            if att.get("email") == user_email:
-                att["responseStatus"] = (
-                    "accepted" if response == "accepted" else "declined"
-                )
-                updated = True
-        if not updated:
-            return "User is not an attendee of this event."
-        event["attendees"] = attendees
-        updated_event = (
-            service.events()
-            .update(
-                calendarId=calendar_id, eventId=event_id, body=event, sendUpdates="all"
-            )
-            .execute()
+        event = _cached_event(service, event_id, calendar_id)
+        user_email = get_user_email().lower()
+        response_status = "accepted" if response == "accepted" else "declined"
+
+        def with_response(current):
+            updated = False
+            attendees = []
+            for att in current.get("attendees", []):
+                if att.get("self") or att.get("email", "").lower() == user_email:
+                    att = {**att, "responseStatus": response_status}
+                    updated = True
+                attendees.append(att)
+            return attendees if updated else None
+
+        updated_event = _patch_attendees(
+            service, calendar_id, event_id, event, with_response
         )
+        if updated_event is None:
+            return "User is not an attendee of this event."
         return updated_event
     except HttpError as error:
         return f"An error occurred: {error}"
@@ -237,30 +797,28 @@ def get_contact_info():
         list: List of contacts with name and email.
     """
     try:
-        service = get_people_service()
-        results = (
-            service.people()
-            .connections()
-            .list(
-                resourceName="people/me",
-                pageSize=1000,
-                personFields="names,emailAddresses",
-            )
-            .execute()
-        )
-        contacts = results.get("connections", [])
-        contact_list = []
-        for person in contacts:
-            names = person.get("names", [])
-            emails = person.get("emailAddresses", [])
-            if names and emails:
-                contact_list.append(
-                    {
-                        "name": names[0].get("displayName"),
-                        "email": emails[0].get("value"),
-                    }
-                )
-        return contact_list
+        index = get_contact_index()
+        index.sync(get_people_service())
+        return index.all()
+    except HttpError as error:
+        return f"An error occurred: {error}"
+
+
+def lookup_contact(name: str, top_k: int = 5):
+    """
+    Finds the contacts whose name or email best matches the given text.
+    Tolerates partial names ("Al Smi"), nicknames that share a prefix and small typos.
+    Args:
+        name (str): A name, part of a name, or an email address.
+        top_k (int, optional): Maximum number of matches to return (default 5).
+    Returns:
+        list: Matches, best first, each with name, email and a score from 0 to 1
+        (1.0 is an exact name or email match). Empty if nothing is similar.
+    """
+    try:
+        index = get_contact_index()
+        index.sync(get_people_service())
+        return index.lookup(name, top_k=top_k)
     except HttpError as error:
         return f"An error occurred: {error}"
 
@@ -280,7 +838,12 @@ def add_contact_info(name: str, email: str):
             "names": [{"givenName": name}],
             "emailAddresses": [{"value": email}],
         }
-        new_contact = service.people().createContact(body=contact_body).execute()
+        new_contact = (
+            service.people()
+            .createContact(body=contact_body, personFields=PERSON_FIELDS)
+            .execute()
+        )
+        get_contact_index().record_change(new_contact)
         return new_contact
     except HttpError as error:
         return f"An error occurred: {error}"
@@ -0,0 +1,165 @@
+from google.oauth2.credentials import Credentials
+from google_auth_oauthlib.flow import InstalledAppFlow
+from google.auth.transport.requests import Request
+from datetime import datetime, timezone
+import os
+import tempfile
+import threading
+
+# Refresh this many seconds before the access token actually expires.
+REFRESH_MARGIN_SECONDS = 300
+# Upper bound on how long the refresher sleeps, so tokens refreshed by the
+# transport itself still get persisted reasonably soon.
+MAX_SLEEP_SECONDS = 60
+RETRY_SECONDS = 30
+
+
+def _utcnow():
+    # google-auth stores expiry as a naive UTC datetime
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def atomic_write(path, data):
+    """
+    Writes data to path atomically (temp file in the same directory + rename).
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "w") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+class CredentialManager:
+    """
+    Keeps one user's OAuth credentials in memory and refreshes them ahead of
+    expiry on a background thread. token.json is only read on first use (or
+    reload) and only rewritten when the token actually changed.
+    """
+
+    def __init__(self, token_file, scopes, credentials_file):
+        self.token_file = token_file
+        self.scopes = scopes
+        self.credentials_file = credentials_file
+        self._creds = None
+        self._persisted = None
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def get(self):
+        """
+        Returns the in-memory credentials. Never performs network or disk I/O
+        once the credentials have been loaded.
+        """
+        creds = self._creds
+        if creds is not None:
+            return creds
+        with self._lock:
+            if self._creds is None:
+                self._load()
+                self._start()
+            return self._creds
+
+    def reload(self):
+        """
+        Re-reads the token file, e.g. after a new authorization was written.
+        """
+        with self._lock:
+            self._load()
+            self._start()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+
+    def _load(self):
+        creds = None
+        if os.path.exists(self.token_file):
+            creds = Credentials.from_authorized_user_file(self.token_file, self.scopes)
+            self._persisted = creds.token
+        if not creds or (not creds.valid and not creds.refresh_token):
+            # No usable token at all: the interactive flow is unavoidable.
+            flow = InstalledAppFlow.from_client_secrets_file(
+                self.credentials_file, self.scopes
+            )
+            creds = flow.run_local_server(port=0)
+        self._creds = creds
+        # Let the refresher handle an expired token and persist a new one.
+        self._wake.set()
+
+    def _start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="credential-refresher", daemon=True
+        )
+        self._thread.start()
+
+    def _seconds_until_refresh(self, creds):
+        if creds.expiry is None:
+            return MAX_SLEEP_SECONDS
+        remaining = (creds.expiry - _utcnow()).total_seconds() - REFRESH_MARGIN_SECONDS
+        return max(0, min(remaining, MAX_SLEEP_SECONDS))
+
+    def _run(self):
+        while not self._stop.is_set():
+            creds = self._creds
+            delay = self._seconds_until_refresh(creds)
+            try:
+                if delay <= 0 and creds.refresh_token:
+                    creds.refresh(Request())
+                self._persist_if_changed(creds)
+            except Exception as e:
+                print(f"Credential refresh failed: {e}")
+                delay = RETRY_SECONDS
+            else:
+                delay = (
+                    self._seconds_until_refresh(creds)
+                    if creds.refresh_token
+                    else MAX_SLEEP_SECONDS
+                )
+            self._wake.wait(delay)
+            self._wake.clear()
+
+    def _persist_if_changed(self, creds):
+        if creds.token == self._persisted:
+            return
+        atomic_write(self.token_file, creds.to_json())
+        self._persisted = creds.token
+
+
+_managers = {}
+_managers_lock = threading.Lock()
+
+
+def get_credential_manager(scopes, token_file, credentials_file):
+    """
+    Returns the process-wide credential manager for a token file and scope set.
+    """
+    key = (os.path.abspath(token_file), tuple(scopes))
+    with _managers_lock:
+        manager = _managers.get(key)
+        if manager is None:
+            manager = CredentialManager(token_file, scopes, credentials_file)
+            _managers[key] = manager
+        return key, manager
+
+
+def reload_credentials():
+    """
+    Re-reads every managed token file from disk.
+    """
+    with _managers_lock:
+        managers = list(_managers.values())
+    for manager in managers:
+        manager.reload()
@@ -0,0 +1,104 @@
+from personal_assistant.common.credential_utils import atomic_write
+import json
+import os
+import threading
+import requests
+
+# Discovery documents for the APIs the agents use, stored pre-serialized next
+# to the package so a cold instance never has to fetch or re-parse the full
+# upstream document. Populate with prime_discovery_cache() (deploy.py does this
+# before packaging). Default for the DISCOVERY_CACHE_DIR setting, which is
+# read on use so a value from .env applies.
+DISCOVERY_CACHE_DIR = os.path.join(os.path.dirname(__file__), "discovery_cache")
+DISCOVERY_URL = "https://{service}.googleapis.com/$discovery/rest?version={version}"
+SERVICES = [("gmail", "v1"), ("calendar", "v3"), ("people", "v1")]
+
+_documents = {}
+_documents_lock = threading.Lock()
+
+
+def _cache_dir():
+    return os.getenv("DISCOVERY_CACHE_DIR", DISCOVERY_CACHE_DIR)
+
+
+def _cache_path(service_name, version):
+    return os.path.join(_cache_dir(), f"{service_name}.{version}.json")
+
+
+def _strip_descriptions(node):
+    """
+    Drops human-readable descriptions (about half of a discovery document).
+    Only string values are removed, so schema properties that happen to be
+    called "description" are kept.
+    """
+    if isinstance(node, dict):
+        return {
+            key: _strip_descriptions(value)
+            for key, value in node.items()
+            if not (key == "description" and isinstance(value, str))
+        }
+    if isinstance(node, list):
+        return [_strip_descriptions(value) for value in node]
+    return node
+
+
+def _fetch_discovery_document(service_name, version):
+    """
+    Returns the raw discovery document, preferring the copy bundled with
+    google-api-python-client over a network fetch.
+    """
+    try:
+        from googleapiclient.discovery_cache import get_static_doc
+
+        content = get_static_doc(service_name, version)
+    except ImportError:
+        content = None
+    if content:
+        return json.loads(content)
+    response = requests.get(
+        DISCOVERY_URL.format(service=service_name, version=version), timeout=10
+    )
+    response.raise_for_status()
+    return response.json()
+
+
+def prime_discovery_cache(services=SERVICES):
+    """
+    Writes the compacted discovery documents for the given services to the cache dir.
+    """
+    os.makedirs(_cache_dir(), exist_ok=True)
+    paths = []
+    for service_name, version in services:
+        document = _strip_descriptions(_fetch_discovery_document(service_name, version))
+        path = _cache_path(service_name, version)
+        atomic_write(path, json.dumps(document, separators=(",", ":")))
+        with _documents_lock:
+            _documents[(service_name, version)] = document
+        paths.append(path)
+    return paths
+
+
+def get_discovery_document(service_name, version):
+    """
+    Returns the cached discovery document for a service, loading it lazily from
+    the cache file (and creating that file on first use). Returns None when no
+    document can be obtained, so callers can fall back to a plain build().
+    """
+    key = (service_name, version)
+    with _documents_lock:
+        document = _documents.get(key)
+        if document is not None:
+            return document
+        path = _cache_path(service_name, version)
+        if os.path.exists(path):
+            with open(path, "r") as f:
+                document = json.load(f)
+            _documents[key] = document
+            return document
+    try:
+        prime_discovery_cache([key])
+    except Exception as e:
+        print(f"Could not cache discovery document for {service_name} {version}: {e}")
+        return None
+    with _documents_lock:
+        return _documents.get(key)
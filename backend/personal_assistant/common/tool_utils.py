@@ -1,16 +1,49 @@
-from google.oauth2.credentials import Credentials
-from google_auth_oauthlib.flow import InstalledAppFlow
-from google.auth.transport.requests import Request
-from googleapiclient.discovery import build
-import os
+from google_auth_httplib2 import AuthorizedHttp
+from googleapiclient.discovery import build, build_from_document
+from googleapiclient.errors import HttpError
+from googleapiclient.http import HttpRequest
+from personal_assistant.common.credential_utils import (
+    get_credential_manager,
+    reload_credentials,
+)
+from personal_assistant.common.discovery_utils import get_discovery_document
+import httplib2
+import threading
 
 SCOPES = [
     "https://www.googleapis.com/auth/calendar",
     "https://www.googleapis.com/auth/contacts",
     "https://www.googleapis.com/auth/gmail.readonly",
     "https://www.googleapis.com/auth/gmail.send",
+    "https://www.googleapis.com/auth/gmail.modify",
 ]
 
+# Service clients are built once per (service, version, credential identity)
+# and shared by every tool call afterwards.
+_client_lock = threading.Lock()
+_clients = {}
+_client_stats = {"hits": 0, "misses": 0}
+# Email address of the authenticated user, per credential identity.
+_identities = {}
+# Callbacks that drop account-specific state kept by the agents (mailbox
+# mirror, caches, event stores, contact index); run by clear_service_cache.
+_reset_hooks = []
+
+
+def _thread_local_request_builder(creds):
+    """
+    httplib2.Http is not thread-safe, so each thread gets its own authorized
+    transport (and keep-alive connection) while sharing the same service client.
+    """
+    local = threading.local()
+
+    def build_request(http, *args, **kwargs):
+        if getattr(local, "http", None) is None:
+            local.http = AuthorizedHttp(creds, http=httplib2.Http())
+        return HttpRequest(local.http, *args, **kwargs)
+
+    return build_request
+
 
 def get_google_service(
     service_name,
@@ -21,18 +54,89 @@ def get_google_service(
 ):
     """
     Returns a Google API service client for the specified service.
+    Clients are cached and reused across calls; the credentials they use are
+    kept fresh in the background by the credential manager.
     """
-    creds = None
     if scopes is None:
         raise ValueError("Scopes must be provided")
-    if os.path.exists(token_file):
-        creds = Credentials.from_authorized_user_file(token_file, scopes)
-    if not creds or not creds.valid:
-        if creds and creds.expired and creds.refresh_token:
-            creds.refresh(Request())
+    credential_key, manager = get_credential_manager(
+        scopes, token_file, credentials_file
+    )
+    creds = manager.get()
+    key = (service_name, version, credential_key, id(creds))
+    with _client_lock:
+        client = _clients.get(key)
+        if client is not None:
+            _client_stats["hits"] += 1
+            return client
+        _client_stats["misses"] += 1
+        http = AuthorizedHttp(creds, http=httplib2.Http())
+        request_builder = _thread_local_request_builder(creds)
+        document = get_discovery_document(service_name, version)
+        if document is not None:
+            client = build_from_document(
+                document, http=http, requestBuilder=request_builder
+            )
         else:
-            flow = InstalledAppFlow.from_client_secrets_file(credentials_file, scopes)
-            creds = flow.run_local_server(port=0)
-        with open(token_file, "w") as token:
-            token.write(creds.to_json())
-    return build(service_name, version, credentials=creds)
+            client = build(
+                service_name, version, http=http, requestBuilder=request_builder
+            )
+        _clients[key] = client
+        return client
+
+
+def get_user_email(token_file="token.json", credentials_file="credentials.json"):
+    """
+    Returns the authenticated user's email address, looked up once per
+    credential and cached in process: Gmail's profile first, the primary
+    calendar's id (which is the owner's address) as a fallback.
+    """
+    credential_key, _ = get_credential_manager(SCOPES, token_file, credentials_file)
+    with _client_lock:
+        email = _identities.get(credential_key)
+    if email:
+        return email
+    try:
+        gmail = get_google_service(
+            "gmail", "v1", token_file=token_file, credentials_file=credentials_file
+        )
+        email = gmail.users().getProfile(userId="me").execute()["emailAddress"]
+    except HttpError:
+        calendar = get_google_service(
+            "calendar", "v3", token_file=token_file, credentials_file=credentials_file
+        )
+        email = calendar.calendars().get(calendarId="primary").execute()["id"]
+    with _client_lock:
+        _identities[credential_key] = email
+    return email
+
+
+def get_client_stats():
+    """
+    Returns the service client cache hit/miss counters.
+    """
+    with _client_lock:
+        return {**_client_stats, "clients": len(_clients)}
+
+
+def on_account_reset(hook):
+    """
+    Registers a callback that clears account-specific state when the
+    credentials change. Usable as a decorator.
+    """
+    _reset_hooks.append(hook)
+    return hook
+
+
+def clear_service_cache():
+    """
+    Reloads credentials from disk and drops every cached service client, user
+    identity and piece of account-specific state (e.g. after re-authorization).
+    """
+    reload_credentials()
+    with _client_lock:
+        _clients.clear()
+        # Re-authorization may have been for a different account
+        _identities.clear()
+    for hook in _reset_hooks:
+        hook()
@@ -0,0 +1,182 @@
+from personal_assistant.email_agent.tool import fetch_lastest_emails
+from personal_assistant.calendar_agent.tool import get_events
+from personal_assistant.mobility_agent.tool import get_current_weather
+from datetime import datetime, timedelta
+import asyncio
+import json
+import time
+
+# How often each dashboard source is re-synced while at least one client is connected.
+EMAIL_INTERVAL_SECONDS = 30
+CALENDAR_INTERVAL_SECONDS = 60
+WEATHER_INTERVAL_SECONDS = 600
+HEARTBEAT_SECONDS = 15
+WEATHER_ADDRESS = "Richardson, TX"
+DASHBOARD_EMAILS = 10
+DASHBOARD_EVENTS = 10
+
+
+def _fetch_emails():
+    return fetch_lastest_emails(DASHBOARD_EMAILS)
+
+
+def _fetch_events():
+    today = datetime.now().strftime("%Y-%m-%d")
+    tomorrow = (datetime.now() + timedelta(days=1)).strftime("%Y-%m-%d")
+    return get_events(start_date=today, end_date=tomorrow, max_results=DASHBOARD_EVENTS)
+
+
+def _fetch_weather():
+    return get_current_weather(WEATHER_ADDRESS)
+
+
+def _diff_by_id(previous, current):
+    """
+    Returns (added, updated, removed_ids) between two {id: item} maps.
+    """
+    added = [item for key, item in current.items() if key not in previous]
+    updated = [
+        item
+        for key, item in current.items()
+        if key in previous and previous[key] != item
+    ]
+    removed = [key for key in previous if key not in current]
+    return added, updated, removed
+
+
+class DashboardFeed:
+    """
+    Runs one background sync loop per user and pushes only what changed to
+    every connected dashboard. Upstream traffic depends on the sync
+    intervals, not on how many tabs are open.
+    """
+
+    def __init__(self, user_id):
+        self.user_id = user_id
+        self.emails = {}
+        self.events = {}
+        self.weather = None
+        self.weather_synced = False
+        self._subscribers = set()
+        self._task = None
+
+    def snapshot(self):
+        return {
+            "type": "snapshot",
+            "emails": list(self.emails.values()),
+            "events": list(self.events.values()),
+            "weather": self.weather,
+        }
+
+    def subscribe(self):
+        queue = asyncio.Queue()
+        if self.emails or self.events or self.weather_synced:
+            queue.put_nowait(self.snapshot())
+        self._subscribers.add(queue)
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+        return queue
+
+    def unsubscribe(self, queue):
+        self._subscribers.discard(queue)
+        if not self._subscribers and self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def _publish(self, message):
+        for queue in self._subscribers:
+            queue.put_nowait(message)
+
+    async def _run(self):
+        sources = [
+            (EMAIL_INTERVAL_SECONDS, self._sync_emails),
+            (CALENDAR_INTERVAL_SECONDS, self._sync_events),
+            (WEATHER_INTERVAL_SECONDS, self._sync_weather),
+        ]
+        due = [0.0] * len(sources)
+        while True:
+            now = time.monotonic()
+            for i, (interval, sync) in enumerate(sources):
+                if now < due[i]:
+                    continue
+                due[i] = now + interval
+                try:
+                    await sync()
+                except Exception as e:
+                    print(f"Dashboard sync failed for user {self.user_id}: {e}")
+            await asyncio.sleep(max(0.0, min(due) - time.monotonic()))
+
+    async def _sync_emails(self):
+        result = await asyncio.to_thread(_fetch_emails)
+        if not isinstance(result, list):
+            return
+        # Skip the {"error": ...} note about emails that could not be fetched
+        current = {email["id"]: email for email in result if "id" in email}
+        added, updated, removed = _diff_by_id(self.emails, current)
+        self.emails = current
+        if added or updated or removed:
+            self._publish(
+                {
+                    "type": "emails",
+                    "added": added,
+                    "updated": updated,
+                    "removed": removed,
+                }
+            )
+
+    async def _sync_events(self):
+        result = await asyncio.to_thread(_fetch_events)
+        if not isinstance(result, list):
+            return
+        current = {event["id"]: event for event in result}
+        added, updated, removed = _diff_by_id(self.events, current)
+        self.events = current
+        if added or updated or removed:
+            self._publish(
+                {
+                    "type": "events",
+                    "added": added,
+                    "updated": updated,
+                    "removed": removed,
+                }
+            )
+
+    async def _sync_weather(self):
+        result = await asyncio.to_thread(_fetch_weather)
+        if not isinstance(result, dict) or "error" in result:
+            # Keep showing the last good weather; if there is none yet, tell
+            # dashboards so they stop waiting for it
+            if self.weather_synced:
+                return
+            result = None
+        if result != self.weather or not self.weather_synced:
+            self.weather = result
+            self.weather_synced = True
+            self._publish({"type": "weather", "weather": result})
+
+
+_feeds = {}
+
+
+def get_dashboard_feed(user_id):
+    feed = _feeds.get(user_id)
+    if feed is None:
+        feed = DashboardFeed(user_id)
+        _feeds[user_id] = feed
+    return feed
+
+
+async def dashboard_to_client_sse(feed):
+    """Dashboard to client communication via SSE"""
+    queue = feed.subscribe()
+    try:
+        while True:
+            try:
+                message = await asyncio.wait_for(queue.get(), HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                # SSE comment line, keeps proxies from closing an idle stream
+                yield ": keep-alive\n\n"
+                continue
+            yield f"data: {json.dumps(message)}\n\n"
+    finally:
+        feed.unsubscribe(queue)
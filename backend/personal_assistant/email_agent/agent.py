@@ -2,9 +2,11 @@ from personal_assistant.email_agent.tool import (
     fetch_lastest_emails,
     send_email,
     search_emails,
+    read_email,
     reply_email,
     set_auto_reply,
     download_attachments,
+    mark_email,
 )
 from google.adk.agents import Agent
 
@@ -17,12 +19,14 @@ email_agent = Agent(
         fetch_lastest_emails,
         send_email,
         search_emails,
+        read_email,
         reply_email,
         set_auto_reply,
         download_attachments,
+        mark_email,
     ],
     instruction="""You are email_agent, an intelligent email management assistant. 
-    Your core functions include sending, retrieving, searching, replying, download attachments and setup auto-replies. 
+    Your core functions include sending, retrieving, searching, reading, replying, download attachments, marking emails read/unread or starred, and setup auto-replies. 
     **Once you complete one request from root_agent, always summarize and output the current state to the user, then transfer back to the root_agent.**
 
     == CORE PRINCIPLES ==
@@ -0,0 +1,121 @@
+from personal_assistant.common.credential_utils import atomic_write
+import base64
+import hashlib
+import json
+import os
+import tempfile
+import threading
+
+# Defaults for the ATTACHMENT_DIR, MAX_ATTACHMENT_WORKERS and
+# MAX_ATTACHMENT_BYTES_PER_MESSAGE settings, see attachment_settings().
+ATTACHMENT_DIR = "./attachments"
+# Attachments of one message are downloaded concurrently with this many workers.
+MAX_ATTACHMENT_WORKERS = 4
+# Attachments beyond this total size (per message) are skipped.
+MAX_ATTACHMENT_BYTES_PER_MESSAGE = 25 * 1024 * 1024
+# Base64 is decoded and written in slices of this many characters (multiple of 4).
+DECODE_CHUNK_CHARS = 1024 * 1024
+
+_INDEX_FILE = "index.json"
+_index_lock = threading.Lock()
+
+
+def attachment_settings():
+    """
+    Returns (download_dir, max_workers, max_bytes_per_message). Read on each
+    download rather than at import, so settings from .env apply.
+    """
+    return (
+        os.getenv("ATTACHMENT_DIR", ATTACHMENT_DIR),
+        int(os.getenv("MAX_ATTACHMENT_WORKERS", str(MAX_ATTACHMENT_WORKERS))),
+        int(
+            os.getenv(
+                "MAX_ATTACHMENT_BYTES_PER_MESSAGE",
+                str(MAX_ATTACHMENT_BYTES_PER_MESSAGE),
+            )
+        ),
+    )
+
+
+def iter_attachment_parts(payload):
+    """
+    Yields every attachment part of a message payload, including nested multiparts.
+    """
+    if payload.get("filename") and (
+        "attachmentId" in payload.get("body", {}) or payload.get("body", {}).get("data")
+    ):
+        yield payload
+    for part in payload.get("parts", []):
+        yield from iter_attachment_parts(part)
+
+
+def store_base64(data, filename, download_dir):
+    """
+    Decodes base64url data to disk in chunks and stores it under its SHA-256
+    content hash, so identical files are only written once.
+
+    Returns:
+        str: Path of the stored file (<sha256><original extension>).
+    """
+    os.makedirs(download_dir, exist_ok=True)
+    digest = hashlib.sha256()
+    fd, tmp_path = tempfile.mkstemp(dir=download_dir, prefix=".part-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            for start in range(0, len(data), DECODE_CHUNK_CHARS):
+                chunk = data[start : start + DECODE_CHUNK_CHARS]
+                # Gmail may omit padding on the final chunk
+                chunk += "=" * (-len(chunk) % 4)
+                decoded = base64.urlsafe_b64decode(chunk)
+                digest.update(decoded)
+                f.write(decoded)
+        extension = os.path.splitext(os.path.basename(filename))[1]
+        path = os.path.join(download_dir, digest.hexdigest() + extension)
+        if os.path.exists(path):
+            os.remove(tmp_path)
+        else:
+            os.replace(tmp_path, path)
+        return path
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def _index_path(download_dir):
+    return os.path.join(download_dir, _INDEX_FILE)
+
+
+def lookup_downloaded(message_id, download_dir):
+    """
+    Returns the index entry of a previous (possibly partial) download of this
+    message if all its files are still on disk, otherwise None. Entries hold
+    "files" ({"part_id", "filename", "path"}), "skipped" and "max_bytes".
+    """
+    with _index_lock:
+        try:
+            with open(_index_path(download_dir), "r") as f:
+                entry = json.load(f).get(message_id)
+        except (OSError, ValueError):
+            return None
+    # Entries from before files carried their names are ignored
+    if not entry or "max_bytes" not in entry:
+        return None
+    if all(os.path.exists(file["path"]) for file in entry["files"]):
+        return entry
+    return None
+
+
+def record_downloaded(message_id, result, download_dir):
+    """
+    Remembers which stored files belong to a message, and which attachments
+    were skipped under which size limit.
+    """
+    with _index_lock:
+        try:
+            with open(_index_path(download_dir), "r") as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            index = {}
+        index[message_id] = result
+        atomic_write(_index_path(download_dir), json.dumps(index))
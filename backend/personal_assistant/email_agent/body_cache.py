@@ -0,0 +1,166 @@
+from collections import OrderedDict
+from personal_assistant.common.credential_utils import atomic_write
+from personal_assistant.common.tool_utils import on_account_reset
+from personal_assistant.email_agent.mailbox import get_mailbox_mirror
+from personal_assistant.email_agent.message_utils import (
+    EmailRecord,
+    IncompleteBatchError,
+    fetch_email_records,
+)
+import json
+import os
+import re
+import sqlite3
+import threading
+
+# Defaults for the EMAIL_BODY_CACHE_SIZE (decoded messages kept in memory;
+# least recently used are evicted) and EMAIL_BODY_CACHE_DIR (optional
+# directory that persists them across restarts) settings.
+BODY_CACHE_SIZE = 256
+EMAIL_BODY_CACHE_DIR = None
+# Labels change (read, starred, archived...); everything else in a Gmail
+# message is fixed once it exists, so only these fields are cached.
+_IMMUTABLE_FIELDS = tuple(slot for slot in EmailRecord.__slots__ if slot != "labels")
+
+_SAFE_ID = re.compile(r"^[A-Za-z0-9_-]+$")
+
+
+class BodyCache:
+    """
+    LRU cache of decoded messages keyed by message id, optionally backed by
+    one JSON file per message on disk. Only the immutable parts of a message
+    are kept (not its labels), so entries never go stale.
+    """
+
+    def __init__(self, max_entries=BODY_CACHE_SIZE, directory=EMAIL_BODY_CACHE_DIR):
+        self.max_entries = max_entries
+        self.directory = directory
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _path(self, message_id):
+        if not self.directory or not _SAFE_ID.match(message_id):
+            return None
+        return os.path.join(self.directory, f"{message_id}.json")
+
+    def _remember(self, record):
+        self._entries[record.id] = record
+        self._entries.move_to_end(record.id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def get(self, message_id):
+        with self._lock:
+            record = self._entries.get(message_id)
+            if record is not None:
+                self._entries.move_to_end(message_id)
+                return record
+        path = self._path(message_id)
+        if path is None or not os.path.exists(path):
+            return None
+        with open(path, "r") as f:
+            record = EmailRecord(**json.load(f))
+        with self._lock:
+            self._remember(record)
+        return record
+
+    def put(self, record):
+        data = {field: getattr(record, field) for field in _IMMUTABLE_FIELDS}
+        with self._lock:
+            self._remember(EmailRecord(**data))
+        path = self._path(record.id)
+        if path is not None:
+            os.makedirs(self.directory, exist_ok=True)
+            atomic_write(path, json.dumps(data))
+
+    def clear(self):
+        """
+        Drops every entry, in memory and on disk.
+        """
+        with self._lock:
+            self._entries.clear()
+        if not self.directory or not os.path.isdir(self.directory):
+            return
+        for name in os.listdir(self.directory):
+            if name.endswith(".json") and _SAFE_ID.match(name[: -len(".json")]):
+                os.remove(os.path.join(self.directory, name))
+
+
+_body_cache = None
+_body_cache_lock = threading.Lock()
+
+
+@on_account_reset
+def _reset_body_cache():
+    with _body_cache_lock:
+        cache = _body_cache
+    if cache is not None:
+        cache.clear()
+
+
+def get_body_cache():
+    """
+    Returns the process-wide body cache, configured from the environment on
+    first use rather than at import, so settings from .env apply.
+    """
+    global _body_cache
+    with _body_cache_lock:
+        if _body_cache is None:
+            _body_cache = BodyCache(
+                max_entries=int(
+                    os.getenv("EMAIL_BODY_CACHE_SIZE", str(BODY_CACHE_SIZE))
+                ),
+                directory=os.getenv("EMAIL_BODY_CACHE_DIR", EMAIL_BODY_CACHE_DIR),
+            )
+        return _body_cache
+
+
+def _mirrored_bodies(message_ids):
+    mirror = get_mailbox_mirror()
+    if mirror is None or not mirror.ready():
+        return []
+    try:
+        return mirror.get_bodies(message_ids)
+    except sqlite3.Error as error:
+        print(f"Mailbox mirror read failed, using the Gmail API: {error}")
+        return []
+
+
+def fetch_full_records(service, message_ids):
+    """
+    Returns EmailRecords with decoded bodies, in the order of message_ids.
+    Bodies come from the cache or the mailbox mirror when possible; only the
+    remaining messages are fetched, in one batch. Cached records carry no labels.
+    Raises IncompleteBatchError, with every record it has, if some messages
+    could not be fetched.
+    """
+    cache = get_body_cache()
+    records = {}
+    missing = []
+    for message_id in message_ids:
+        record = cache.get(message_id)
+        if record is not None:
+            records[message_id] = record
+        else:
+            missing.append(message_id)
+    if missing:
+        for record in _mirrored_bodies(missing):
+            records[record.id] = record
+        missing = [message_id for message_id in missing if message_id not in records]
+    try:
+        fetched = (
+            fetch_email_records(service, missing, message_format="full")
+            if missing
+            else []
+        )
+    except IncompleteBatchError as error:
+        # Keep what did arrive, and report it along with the earlier records
+        for record in error.results:
+            cache.put(record)
+            records[record.id] = record
+        error.results = [records[i] for i in message_ids if i in records]
+        raise
+    for record in fetched:
+        cache.put(record)
+        records[record.id] = record
+    return [records[message_id] for message_id in message_ids if message_id in records]
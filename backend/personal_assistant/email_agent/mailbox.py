@@ -0,0 +1,540 @@
+from googleapiclient.errors import HttpError
+from personal_assistant.common.tool_utils import on_account_reset
+from personal_assistant.email_agent.message_utils import (
+    EmailRecord,
+    IncompleteBatchError,
+    fetch_email_records,
+    to_epoch_ms,
+)
+import os
+import sqlite3
+import threading
+import time
+
+# The mirror is optional: set MAILBOX_MIRROR_PATH (e.g. "mailbox.sqlite3") to
+# let the email tools answer reads locally and only pull history deltas.
+# Default for how many of the most recent messages the initial sync mirrors
+# (MAILBOX_MIRROR_INITIAL_SYNC; 0 = all).
+INITIAL_SYNC_LIMIT = 1000
+# Reads within this many seconds of the last sync do not call Gmail at all.
+SYNC_INTERVAL_SECONDS = 15
+# Bump when the schema changes; an older mirror is rebuilt by a full sync.
+SCHEMA_VERSION = "3"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS messages (
+    id TEXT PRIMARY KEY,
+    thread_id TEXT,
+    internal_date INTEGER,
+    sender TEXT,
+    subject TEXT,
+    date TEXT,
+    snippet TEXT,
+    labels TEXT
+);
+CREATE INDEX IF NOT EXISTS messages_internal_date ON messages (internal_date DESC);
+CREATE TABLE IF NOT EXISTS sync_state (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+# Full-text index over the mirrored messages; rowid matches messages.rowid.
+_FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS messages_fts USING fts5(
+    sender, subject, snippet, body, tokenize = 'unicode61 remove_diacritics 2'
+);
+"""
+
+_COLUMNS = "id, thread_id, internal_date, sender, subject, date, snippet, labels"
+
+
+def _fts_phrase(text):
+    # Quote user input so FTS operators/punctuation are matched literally
+    return '"' + text.replace('"', '""') + '"'
+
+
+def _row_to_record(row):
+    return EmailRecord(
+        id=row[0],
+        thread_id=row[1],
+        internal_date=row[2],
+        sender=row[3],
+        subject=row[4],
+        date=row[5],
+        snippet=row[6],
+        labels=tuple(row[7].split()),
+    )
+
+
+class MailboxMirror:
+    """
+    SQLite-backed mirror of the user's mailbox with an FTS5 index over
+    sender, subject, snippet and body text. One initial sync fills it, after
+    which users.history.list deltas keep both current.
+    """
+
+    def __init__(self, path, initial_sync_limit=INITIAL_SYNC_LIMIT):
+        self.path = path
+        self.initial_sync_limit = initial_sync_limit
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+        try:
+            self._conn.executescript(_FTS_SCHEMA)
+            self.fts = True
+        except sqlite3.OperationalError:
+            # SQLite built without FTS5: fall back to LIKE matching
+            self.fts = False
+        if self._get_state("schema_version") != SCHEMA_VERSION:
+            with self._conn:
+                self._set_state("history_id", None)
+                self._set_state("schema_version", SCHEMA_VERSION)
+        self._lock = threading.RLock()
+        self._last_sync = 0.0
+        self._ready = self._get_state("history_id") is not None
+        self._full_sync_thread = None
+        self._thread_lock = threading.Lock()
+
+    # --- sync state -------------------------------------------------------
+
+    def _get_state(self, key):
+        row = self._conn.execute(
+            "SELECT value FROM sync_state WHERE key = ?", (key,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def _set_state(self, key, value):
+        self._conn.execute(
+            "INSERT OR REPLACE INTO sync_state (key, value) VALUES (?, ?)",
+            (key, None if value is None else str(value)),
+        )
+
+    def _row_values(self, r):
+        return (
+            r.id,
+            r.thread_id,
+            r.internal_date,
+            r.sender,
+            r.subject,
+            r.date,
+            r.snippet,
+            # padded so "labels LIKE '% INBOX %'" matches whole labels
+            f" {' '.join(r.labels)} ",
+        )
+
+    def _upsert(self, records):
+        """
+        Inserts or replaces messages and (re)indexes their text.
+        """
+        for r in records:
+            if self.fts:
+                old = self._conn.execute(
+                    "SELECT rowid FROM messages WHERE id = ?", (r.id,)
+                ).fetchone()
+                if old:
+                    self._conn.execute("DELETE FROM messages_fts WHERE rowid = ?", old)
+            cursor = self._conn.execute(
+                f"INSERT OR REPLACE INTO messages ({_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                self._row_values(r),
+            )
+            if self.fts:
+                self._conn.execute(
+                    "INSERT INTO messages_fts (rowid, sender, subject, snippet, body) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (cursor.lastrowid, r.sender, r.subject, r.snippet, r.body or ""),
+                )
+
+    def _update_labels(self, records):
+        self._conn.executemany(
+            "UPDATE messages SET labels = ? WHERE id = ?",
+            [(f" {' '.join(r.labels)} ", r.id) for r in records],
+        )
+
+    def _delete(self, message_ids):
+        if self.fts:
+            self._conn.executemany(
+                "DELETE FROM messages_fts WHERE rowid = "
+                "(SELECT rowid FROM messages WHERE id = ?)",
+                [(i,) for i in message_ids],
+            )
+        self._conn.executemany(
+            "DELETE FROM messages WHERE id = ?", [(i,) for i in message_ids]
+        )
+
+    # --- syncing ----------------------------------------------------------
+
+    def ready(self):
+        """
+        True once a full sync has completed, so reads can be answered locally.
+        """
+        return self._ready
+
+    def sync(self, service, force=False):
+        """
+        Brings the mirror up to date. Does nothing if it was synced within
+        SYNC_INTERVAL_SECONDS, unless force is set. If the stored historyId
+        has expired the mirror is marked not ready instead of resyncing here.
+        """
+        with self._lock:
+            if not force and time.monotonic() - self._last_sync < SYNC_INTERVAL_SECONDS:
+                return []
+            history_id = self._get_state("history_id")
+            if history_id is None:
+                changed = self._full_sync(service)
+            else:
+                try:
+                    changed = self._retry_pending(service)
+                    changed += self._incremental_sync(service, history_id)
+                except HttpError as error:
+                    # 404: the stored historyId is too old, start over
+                    if error.resp.status != 404:
+                        raise
+                    with self._conn:
+                        self._set_state("history_id", None)
+                    self._ready = False
+                    return []
+            self._last_sync = time.monotonic()
+            return changed
+
+    def reset(self):
+        """
+        Empties the mirror, e.g. after switching accounts; the next read
+        starts a new full sync. Waits for a running sync to finish first.
+        """
+        with self._lock:
+            with self._conn:
+                self._conn.execute("DELETE FROM messages")
+                if self.fts:
+                    self._conn.execute("DELETE FROM messages_fts")
+                self._conn.execute(
+                    "DELETE FROM sync_state WHERE key != 'schema_version'"
+                )
+            self._ready = False
+            self._last_sync = 0.0
+
+    def sync_in_background(self, service):
+        """
+        Starts a full sync on a background thread unless one is already running.
+        """
+        with self._thread_lock:
+            if self._full_sync_thread is not None and self._full_sync_thread.is_alive():
+                return
+            self._full_sync_thread = threading.Thread(
+                target=self._background_sync,
+                args=(service,),
+                name="mailbox-full-sync",
+                daemon=True,
+            )
+            self._full_sync_thread.start()
+
+    def _background_sync(self, service):
+        try:
+            self.sync(service, force=True)
+        except (HttpError, sqlite3.Error) as error:
+            print(f"Mailbox mirror full sync failed: {error}")
+
+    def _pending(self):
+        return (self._get_state("pending") or "").split()
+
+    def has_pending(self):
+        """
+        True while some messages that belong in the mirror failed to fetch.
+        """
+        with self._lock:
+            return bool(self._pending())
+
+    def _fetch_full(self, service, message_ids):
+        """
+        Returns (records, ids that could not be fetched) for message_ids.
+        """
+        try:
+            return fetch_email_records(service, message_ids, message_format="full"), []
+        except IncompleteBatchError as error:
+            return error.results, error.missing
+
+    def _retry_pending(self, service):
+        pending = self._pending()
+        if not pending:
+            return []
+        records, missing = self._fetch_full(service, pending)
+        fetched = {r.id for r in records}
+        with self._conn:
+            # Neither fetched nor failing: deleted in the meantime (404)
+            self._delete([i for i in pending if i not in fetched and i not in missing])
+            self._upsert(records)
+            self._set_state("pending", " ".join(missing))
+            dates = [r.internal_date for r in records if r.internal_date]
+            if dates:
+                coverage_start = int(self._get_state("coverage_start") or 0)
+                self._set_state("coverage_start", min([coverage_start] + dates))
+        return [r.id for r in records]
+
+    def _full_sync(self, service):
+        # Read the historyId first so nothing that arrives during the listing is missed
+        history_id = service.users().getProfile(userId="me").execute()["historyId"]
+        message_ids = []
+        page_token = None
+        complete = False
+        while True:
+            page_size = 500
+            if self.initial_sync_limit:
+                page_size = min(page_size, self.initial_sync_limit - len(message_ids))
+            response = (
+                service.users()
+                .messages()
+                .list(userId="me", maxResults=page_size, pageToken=page_token)
+                .execute()
+            )
+            message_ids.extend(m["id"] for m in response.get("messages", []))
+            page_token = response.get("nextPageToken")
+            if not page_token:
+                complete = True
+                break
+            if self.initial_sync_limit and len(message_ids) >= self.initial_sync_limit:
+                break
+        # Messages that still fail after retries are kept as pending and
+        # fetched again on the next sync; until then covers() is False.
+        records, pending = self._fetch_full(service, message_ids)
+        with self._conn:
+            self._conn.execute("DELETE FROM messages")
+            if self.fts:
+                self._conn.execute("DELETE FROM messages_fts")
+            self._upsert(records)
+            self._set_state("history_id", history_id)
+            self._set_state("pending", " ".join(pending))
+            self._set_state("complete", int(complete))
+            self._set_state(
+                "coverage_start",
+                min((r.internal_date for r in records if r.internal_date), default=0),
+            )
+        self._ready = True
+        return [r.id for r in records]
+
+    def _incremental_sync(self, service, history_id):
+        added = set()
+        relabelled = set()
+        deleted = set()
+        page_token = None
+        while True:
+            response = (
+                service.users()
+                .history()
+                .list(userId="me", startHistoryId=history_id, pageToken=page_token)
+                .execute()
+            )
+            for entry in response.get("history", []):
+                for item in entry.get("messagesAdded", []):
+                    added.add(item["message"]["id"])
+                for key in ("labelsAdded", "labelsRemoved"):
+                    for item in entry.get(key, []):
+                        relabelled.add(item["message"]["id"])
+                for item in entry.get("messagesDeleted", []):
+                    deleted.add(item["message"]["id"])
+            latest_history_id = response.get("historyId", history_id)
+            page_token = response.get("nextPageToken")
+            if not page_token:
+                break
+        added -= deleted
+        relabelled -= added | deleted
+        # New mail is fetched in full so it can be indexed; label changes only
+        # need the metadata projection.
+        records, pending = self._fetch_full(service, list(added)) if added else ([], [])
+        try:
+            relabelled_records = (
+                fetch_email_records(service, list(relabelled)) if relabelled else []
+            )
+        except IncompleteBatchError as error:
+            relabelled_records = error.results
+            # Stale labels of mirrored messages are fixed by refetching them
+            pending += [
+                i
+                for i in error.missing
+                if self._conn.execute(
+                    "SELECT 1 FROM messages WHERE id = ?", (i,)
+                ).fetchone()
+            ]
+        with self._conn:
+            self._delete(deleted)
+            self._upsert(records)
+            self._update_labels(relabelled_records)
+            self._set_state("history_id", latest_history_id)
+            still_pending = set(self._pending()) - deleted - {r.id for r in records}
+            self._set_state("pending", " ".join(sorted(still_pending | set(pending))))
+        return [r.id for r in records]
+
+    # --- reads ------------------------------------------------------------
+
+    def covers(self, after=None):
+        """
+        True if every message newer than `after` is in the mirror.
+        """
+        with self._lock:
+            if self._pending():
+                return False
+            if self._get_state("complete") == "1":
+                return True
+            if after is None:
+                return False
+            coverage_start = int(self._get_state("coverage_start") or 0)
+            return to_epoch_ms(after) >= coverage_start
+
+    def query(
+        self,
+        max_results,
+        label=None,
+        keyword=None,
+        sender=None,
+        subject=None,
+        after=None,
+        before=None,
+    ):
+        """
+        Returns up to max_results EmailRecords matching all filters. Keyword,
+        sender and subject are answered from the full-text index and ranked by
+        relevance; otherwise results are newest first.
+        """
+        clauses = []
+        params = []
+        if label:
+            clauses.append("m.labels LIKE ?")
+            params.append(f"% {label} %")
+        else:
+            # Gmail search excludes spam and trash unless asked for explicitly
+            clauses.append(
+                "m.labels NOT LIKE '% SPAM %' AND m.labels NOT LIKE '% TRASH %'"
+            )
+        if after:
+            clauses.append("m.internal_date >= ?")
+            params.append(to_epoch_ms(after))
+        if before:
+            clauses.append("m.internal_date < ?")
+            params.append(to_epoch_ms(before))
+
+        text_filters = []
+        if keyword:
+            text_filters.extend((None, term) for term in keyword.split())
+        if sender:
+            text_filters.append(("sender", sender))
+        if subject:
+            text_filters.append(("subject", subject))
+
+        if text_filters and self.fts:
+            match = " AND ".join(
+                f"{column} : {_fts_phrase(text)}" if column else _fts_phrase(text)
+                for column, text in text_filters
+            )
+            sql = (
+                f"SELECT {', '.join('m.' + c for c in _COLUMNS.split(', '))} "
+                "FROM messages_fts JOIN messages m ON m.rowid = messages_fts.rowid "
+                "WHERE messages_fts MATCH ?"
+            )
+            params.insert(0, match)
+            order = "bm25(messages_fts), m.internal_date DESC"
+        else:
+            for column, text in text_filters:
+                if column:
+                    clauses.append(f"m.{column} LIKE ?")
+                    params.append(f"%{text}%")
+                else:
+                    clauses.append(
+                        "(m.subject LIKE ? OR m.snippet LIKE ? OR m.sender LIKE ?)"
+                    )
+                    params.extend([f"%{text}%"] * 3)
+            sql = f"SELECT {_COLUMNS} FROM messages m WHERE 1"
+            order = "m.internal_date DESC"
+        for clause in clauses:
+            sql += f" AND {clause}"
+        sql += f" ORDER BY {order} LIMIT ?"
+        params.append(max_results)
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [_row_to_record(row) for row in rows]
+
+    def get_bodies(self, message_ids):
+        """
+        Returns EmailRecords, bodies included, for those of message_ids that
+        are mirrored. Bodies live in the full-text index, so this needs FTS5.
+        """
+        if not self.fts or not message_ids:
+            return []
+        sql = (
+            f"SELECT {', '.join('m.' + c for c in _COLUMNS.split(', '))}, f.body "
+            "FROM messages m JOIN messages_fts f ON f.rowid = m.rowid "
+            f"WHERE m.id IN ({', '.join('?' * len(message_ids))})"
+        )
+        with self._lock:
+            rows = self._conn.execute(sql, list(message_ids)).fetchall()
+        records = []
+        for row in rows:
+            record = _row_to_record(row)
+            record.body = row[8]
+            records.append(record)
+        return records
+
+
+_mirror = None
+_mirror_lock = threading.Lock()
+
+
+def get_mailbox_mirror():
+    """
+    Returns the process-wide mailbox mirror, or None if it is not enabled.
+    """
+    global _mirror
+    # Read on first use rather than at import, so settings from .env apply
+    path = os.getenv("MAILBOX_MIRROR_PATH")
+    if not path:
+        return None
+    with _mirror_lock:
+        if _mirror is None:
+            limit = int(
+                os.getenv("MAILBOX_MIRROR_INITIAL_SYNC", str(INITIAL_SYNC_LIMIT))
+            )
+            _mirror = MailboxMirror(path, initial_sync_limit=limit)
+        return _mirror
+
+
+@on_account_reset
+def _reset_mirror():
+    with _mirror_lock:
+        mirror = _mirror
+    if mirror is not None:
+        mirror.reset()
+
+
+def query_mirror(service, max_results, after=None, **filters):
+    """
+    Answers a read from the mirror after pulling any pending deltas. Returns
+    None when the mirror is disabled, unavailable, still being filled or
+    cannot answer the query completely, in which case the caller should use
+    the Gmail API.
+    """
+    mirror = get_mailbox_mirror()
+    if mirror is None:
+        return None
+    try:
+        if mirror.ready():
+            mirror.sync(service)
+    except (HttpError, sqlite3.Error) as error:
+        print(f"Mailbox mirror sync failed, using the Gmail API: {error}")
+        return None
+    if not mirror.ready():
+        # A full sync fetches up to initial_sync_limit whole messages, far too
+        # slow for one request: fill the mirror off the request path instead
+        mirror.sync_in_background(service)
+        return None
+    if mirror.has_pending():
+        # Some mirrored messages failed to fetch, so even a full page may be wrong
+        return None
+    try:
+        records = mirror.query(max_results, after=after, **filters)
+        # A full page is exactly what Gmail would return (newest first); a short
+        # page is only trustworthy if the mirror covers the whole requested range.
+        if len(records) >= max_results or mirror.covers(after):
+            return records
+    except ValueError:
+        # after/before in a form the mirror cannot compare (e.g. RFC3339);
+        # Gmail gets the raw value instead
+        return None
+    return None
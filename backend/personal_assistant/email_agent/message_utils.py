@@ -0,0 +1,328 @@
+from datetime import datetime, timezone
+from googleapiclient.errors import HttpError
+from html.parser import HTMLParser
+import base64
+import random
+import time
+
+# Gmail accepts up to 100 calls per batch but recommends <= 50 to avoid
+# rate limiting the whole batch.
+BATCH_SIZE = 50
+# Items that fail inside a batch with 429/5xx are retried up to this many
+# times, in smaller batches, after a jittered exponential backoff.
+BATCH_RETRIES = 3
+RETRY_BATCH_SIZE = 10
+RETRY_BACKOFF_SECONDS = 1.0
+
+
+class IncompleteBatchError(Exception):
+    """
+    Raised when some, but not all, of the requested messages could still not
+    be fetched after retries. results holds what was fetched (in request
+    order) and missing the ids that were not.
+    """
+
+    def __init__(self, results, missing, cause):
+        super().__init__(
+            f"{len(missing)} message(s) could not be fetched, e.g. {missing[0]}: {cause}"
+        )
+        self.results = results
+        self.missing = missing
+
+
+def _is_retryable(error):
+    if not isinstance(error, HttpError):
+        # Transport errors (timeouts, dropped connections)
+        return True
+    status = error.resp.status
+    # Gmail also reports rate limiting as 403 rateLimitExceeded
+    return (
+        status == 429
+        or status >= 500
+        or (status == 403 and b"ateLimitExceeded" in (error.content or b""))
+    )
+
+
+def _is_not_found(error):
+    return isinstance(error, HttpError) and error.resp.status == 404
+
+
+def batch_get_messages(service, message_ids, **get_kwargs):
+    """
+    Fetches many messages with users.messages.get, grouped into Gmail batch
+    HTTP requests instead of one round-trip per message. Items that fail
+    with a transient error are fetched again in smaller follow-up batches.
+
+    Args:
+        service: Gmail API service client.
+        message_ids (list): IDs of the messages to fetch.
+        **get_kwargs: Extra arguments for messages.get (e.g. format).
+
+    Returns:
+        list: The message resources, in the order of message_ids. Messages
+              deleted in the meantime (404) are skipped.
+
+    Raises:
+        IncompleteBatchError: Some other messages still failed after retries.
+    """
+    message_ids = list(dict.fromkeys(message_ids))
+    results = {}
+    errors = {}
+
+    def callback(request_id, response, exception):
+        if exception is not None:
+            errors[request_id] = exception
+        else:
+            results[request_id] = response
+            errors.pop(request_id, None)
+
+    pending = message_ids
+    batch_size = BATCH_SIZE
+    for attempt in range(BATCH_RETRIES + 1):
+        if attempt:
+            time.sleep(
+                RETRY_BACKOFF_SECONDS * 2 ** (attempt - 1) * random.uniform(0.5, 1.5)
+            )
+        for start in range(0, len(pending), batch_size):
+            batch = service.new_batch_http_request(callback=callback)
+            for message_id in pending[start : start + batch_size]:
+                batch.add(
+                    service.users()
+                    .messages()
+                    .get(userId="me", id=message_id, **get_kwargs),
+                    request_id=message_id,
+                )
+            batch.execute()
+        pending = [i for i in pending if i in errors and _is_retryable(errors[i])]
+        if not pending:
+            break
+        batch_size = RETRY_BATCH_SIZE
+
+    fetched = [results[i] for i in message_ids if i in results]
+    missing = [i for i in message_ids if i in errors and not _is_not_found(errors[i])]
+    if missing:
+        first = errors[missing[0]]
+        # Surface systemic failures (e.g. auth) instead of returning nothing
+        if not fetched:
+            if isinstance(first, HttpError):
+                raise first
+            raise RuntimeError(str(first))
+        raise IncompleteBatchError(fetched, missing, first)
+    return fetched
+
+
+# Headers needed by the list views; requested with format=metadata so Gmail
+# does not send the message body at all.
+LIST_HEADERS = ["From", "Subject", "Date"]
+_HEADER_FIELDS = {"from": "sender", "subject": "subject", "date": "date"}
+
+
+class EmailRecord:
+    """
+    Compact email summary shared by the email tools.
+    """
+
+    __slots__ = (
+        "id",
+        "thread_id",
+        "sender",
+        "subject",
+        "date",
+        "snippet",
+        "labels",
+        "internal_date",
+        "body",
+    )
+
+    def __init__(
+        self,
+        id,
+        thread_id=None,
+        sender=None,
+        subject=None,
+        date=None,
+        snippet="",
+        labels=(),
+        internal_date=None,
+        body=None,
+    ):
+        self.id = id
+        self.thread_id = thread_id
+        self.sender = sender
+        self.subject = subject
+        self.date = date
+        self.snippet = snippet
+        self.labels = labels
+        self.internal_date = internal_date
+        self.body = body
+
+    @classmethod
+    def from_message(cls, message, with_body=False):
+        """
+        Builds a record from a Gmail message resource, reading the headers in one pass.
+        with_body decodes the text body, which requires a format=full message.
+        """
+        record = cls(
+            id=message["id"],
+            thread_id=message.get("threadId"),
+            snippet=message.get("snippet", ""),
+            labels=tuple(message.get("labelIds", ())),
+            internal_date=int(message.get("internalDate", 0)) or None,
+        )
+        payload = message.get("payload", {})
+        if with_body:
+            record.body = extract_body(payload)
+        for header in payload.get("headers", []):
+            field = _HEADER_FIELDS.get(header["name"].lower())
+            # Keep the first occurrence, like the previous next() scans did
+            if field and getattr(record, field) is None:
+                setattr(record, field, header["value"])
+        return record
+
+    def to_dict(self):
+        email_info = {
+            "snippet": self.snippet,
+            "from": self.sender,
+            "subject": self.subject,
+            "date": self.date,
+            "id": self.id,
+        }
+        if self.body is not None:
+            email_info["body"] = self.body
+        return email_info
+
+
+# Decoded bodies are cut to this many characters.
+BODY_MAX_CHARS = 20000
+
+
+class _HTMLToText(HTMLParser):
+    """
+    Minimal HTML to text conversion: drops scripts/styles, keeps line breaks.
+    """
+
+    _SKIP = {"script", "style", "head"}
+    _BREAK = {"br", "p", "div", "li", "tr", "h1", "h2", "h3", "h4", "h5", "h6"}
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.chunks = []
+        self._skip_depth = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self._SKIP:
+            self._skip_depth += 1
+        elif tag in self._BREAK:
+            self.chunks.append("\n")
+
+    def handle_endtag(self, tag):
+        if tag in self._SKIP and self._skip_depth:
+            self._skip_depth -= 1
+
+    def handle_data(self, data):
+        if not self._skip_depth:
+            self.chunks.append(data)
+
+    def text(self):
+        lines = (" ".join(line.split()) for line in "".join(self.chunks).splitlines())
+        return "\n".join(line for line in lines if line)
+
+
+def html_to_text(html):
+    parser = _HTMLToText()
+    parser.feed(html)
+    parser.close()
+    return parser.text()
+
+
+def _part_charset(part):
+    for header in part.get("headers", []):
+        if header["name"].lower() == "content-type":
+            for param in header["value"].split(";")[1:]:
+                key, _, value = param.strip().partition("=")
+                if key.lower() == "charset":
+                    return value.strip('"') or "utf-8"
+    return "utf-8"
+
+
+def _decode_part(part):
+    data = part.get("body", {}).get("data")
+    if not data:
+        return ""
+    raw = base64.urlsafe_b64decode(data.encode("UTF-8"))
+    try:
+        return raw.decode(_part_charset(part), "replace")
+    except LookupError:
+        return raw.decode("utf-8", "replace")
+
+
+def _collect_parts(payload, mime_type):
+    if payload.get("mimeType") == mime_type and not payload.get("filename"):
+        yield payload
+    for part in payload.get("parts", []):
+        yield from _collect_parts(part, mime_type)
+
+
+def extract_body(payload, max_chars=BODY_MAX_CHARS):
+    """
+    Returns the readable text of a message payload, walking multipart trees.
+    text/plain parts are preferred; HTML-only messages are converted to text.
+    The result is cut to max_chars.
+    """
+    text = "\n".join(
+        t for t in (_decode_part(p) for p in _collect_parts(payload, "text/plain")) if t
+    )
+    if not text.strip():
+        text = "\n".join(
+            html_to_text(_decode_part(p)) for p in _collect_parts(payload, "text/html")
+        )
+    return text[:max_chars]
+
+
+def fetch_email_records(service, message_ids, message_format="metadata"):
+    """
+    Fetches messages as EmailRecords. List views use the default metadata
+    projection; pass message_format="full" only when the payload is needed.
+    Raises IncompleteBatchError (with records as its results) like
+    batch_get_messages.
+    """
+    get_kwargs = {"format": message_format}
+    if message_format == "metadata":
+        get_kwargs["metadataHeaders"] = LIST_HEADERS
+    with_body = message_format == "full"
+    try:
+        messages = batch_get_messages(service, message_ids, **get_kwargs)
+    except IncompleteBatchError as error:
+        error.results = [
+            EmailRecord.from_message(message, with_body=with_body)
+            for message in error.results
+        ]
+        raise
+    return [
+        EmailRecord.from_message(message, with_body=with_body) for message in messages
+    ]
+
+
+def to_query_date(value):
+    """
+    Normalizes an after/before filter (YYYY/MM/DD, YYYY-MM-DD, unix timestamp
+    or datetime) to the form Gmail's search query accepts.
+    """
+    if isinstance(value, datetime):
+        return value.strftime("%Y/%m/%d")
+    return str(value).strip().replace("-", "/")
+
+
+def to_epoch_ms(value):
+    """
+    Converts an after/before filter to milliseconds since epoch (UTC), the unit
+    of a message's internalDate.
+    """
+    if isinstance(value, datetime):
+        moment = value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+        return int(moment.timestamp() * 1000)
+    text = str(value).strip()
+    if text.isdigit():
+        return int(text) * 1000
+    moment = datetime.strptime(text.replace("-", "/"), "%Y/%m/%d")
+    return int(moment.replace(tzinfo=timezone.utc).timestamp() * 1000)
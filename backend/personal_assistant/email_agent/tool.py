@@ -4,13 +4,39 @@ from email.mime.text import MIMEText
 from datetime import datetime
 from typing import Optional, List
 from personal_assistant.common.tool_utils import get_google_service
-import os
+from personal_assistant.email_agent.message_utils import (
+    IncompleteBatchError,
+    fetch_email_records,
+    to_query_date,
+)
+from personal_assistant.email_agent.mailbox import query_mirror
+from personal_assistant.email_agent.body_cache import fetch_full_records
+from personal_assistant.email_agent.attachment_utils import (
+    attachment_settings,
+    iter_attachment_parts,
+    lookup_downloaded,
+    record_downloaded,
+    store_base64,
+)
+from concurrent.futures import ThreadPoolExecutor
+
+# users.messages.batchModify accepts at most this many ids per call.
+BATCH_MODIFY_LIMIT = 1000
 
 
 def get_gmail_service():
     return get_google_service(service_name="gmail", version="v1")
 
 
+def _partial_result(error):
+    """
+    The emails that were fetched, followed by a note about those that were not.
+    """
+    return [record.to_dict() for record in error.results] + [
+        {"error": f"{error} Try again later for the rest."}
+    ]
+
+
 def fetch_lastest_emails(
     max_results: int, after: Optional[str] = None, before: Optional[str] = None
 ) -> list:
@@ -24,9 +50,15 @@ def fetch_lastest_emails(
 
     Returns:
         list: a list of dicts with email details (sender, subject, date, snippet).
+              If some emails could not be fetched, a final {"error": ...} entry says so.
     """
     try:
         service = get_gmail_service()
+        records = query_mirror(
+            service, max_results, label="INBOX", after=after, before=before
+        )
+        if records is not None:
+            return [record.to_dict() for record in records]
         query = ""
         if after:
             query += f"after:{after} "
@@ -44,28 +76,10 @@ def fetch_lastest_emails(
             .execute()
         )
         messages = results.get("messages", [])
-        output = []
-        for msg in messages:
-            msg_data = (
-                service.users().messages().get(userId="me", id=msg["id"]).execute()
-            )
-            headers = msg_data.get("payload", {}).get("headers", [])
-            email_info = {
-                "snippet": msg_data.get("snippet", ""),
-                "from": next(
-                    (h["value"] for h in headers if h["name"].lower() == "from"), None
-                ),
-                "subject": next(
-                    (h["value"] for h in headers if h["name"].lower() == "subject"),
-                    None,
-                ),
-                "date": next(
-                    (h["value"] for h in headers if h["name"].lower() == "date"), None
-                ),
-                "id": msg["id"],
-            }
-            output.append(email_info)
-        return output
+        records = fetch_email_records(service, [msg["id"] for msg in messages])
+        return [record.to_dict() for record in records]
+    except IncompleteBatchError as error:
+        return _partial_result(error)
     except HttpError as error:
         return f"An error occurred: {error}"
 
@@ -104,11 +118,12 @@ def search_emails(
     subject: Optional[str] = None,
     after: Optional[str] = None,
     before: Optional[str] = None,
+    include_body: bool = False,
 ) -> List[dict]:
     """
-    Search Gmail messages using the Gmail API with optional filters and return full email content.
+    Search Gmail messages using the Gmail API with optional filters, optionally returning the full email content.
 
-    This function constructs a Gmail search query based on the provided parameters and retrieves matching emails using the Gmail API. It returns a list of email metadata including sender, subject, date, and the plain text body of the message.
+    This function constructs a Gmail search query based on the provided parameters and retrieves matching emails using the Gmail API. It returns a list of email metadata including sender, subject, date and snippet, plus the plain text body of the message when include_body is True.
 
     Parameters:
     max_results (int): Maximum number of emails to return.
@@ -117,62 +132,87 @@ def search_emails(
     subject (str, optional): Filter by subject line.
     after (datetime, optional): Filter emails sent after this (YYYY/MM/DD or unix timestamp).
     before (datetime, optional): Filter emails sent before this (YYYY/MM/DD or unix timestamp).
+    include_body (bool, optional): Also return the decoded body text of each email (default False).
     Returns:
 
-    List[dict]: A list of emails, each represented as a dictionary
+    List[dict]: A list of emails, each represented as a dictionary. If some emails could not be fetched, a final {"error": ...} entry says so.
     """
     # Build the Gmail API service
     try:
         service = get_gmail_service()
 
-        # Construct the search query
-        query_parts = []
-        if keyword:
-            query_parts.append(keyword)
-        if sender:
-            query_parts.append(f"from:{sender}")
-        if subject:
-            query_parts.append(f"subject:{subject}")
-        if after:
-            query_parts.append(f"after:{after.strftime('%Y/%m/%d')}")
-        if before:
-            query_parts.append(f"before:{before.strftime('%Y/%m/%d')}")
-        query = " ".join(query_parts)
-
-        # Search for messages
-        results = (
-            service.users()
-            .messages()
-            .list(userId="me", q=query, maxResults=max_results)
-            .execute()
+        # Answer from the local mirror when it is enabled and up to date
+        records = query_mirror(
+            service,
+            max_results,
+            keyword=keyword,
+            sender=sender,
+            subject=subject,
+            after=after,
+            before=before,
         )
-        messages = results.get("messages", [])
-        output = []
-        for msg in messages:
-            msg_data = (
-                service.users().messages().get(userId="me", id=msg["id"]).execute()
+        if records is None:
+            records = _search_gmail(
+                service, max_results, keyword, sender, subject, after, before
             )
-            headers = msg_data.get("payload", {}).get("headers", [])
-            email_info = {
-                "snippet": msg_data.get("snippet", ""),
-                "from": next(
-                    (h["value"] for h in headers if h["name"].lower() == "from"), None
-                ),
-                "subject": next(
-                    (h["value"] for h in headers if h["name"].lower() == "subject"),
-                    None,
-                ),
-                "date": next(
-                    (h["value"] for h in headers if h["name"].lower() == "date"), None
-                ),
-                "id": msg["id"],
-            }
-            output.append(email_info)
-        return output
+        if include_body:
+            records = fetch_full_records(service, [record.id for record in records])
+        return [record.to_dict() for record in records]
+    except IncompleteBatchError as error:
+        return _partial_result(error)
     except HttpError as error:
         return f"An error occurred: {error}"
 
 
+def read_email(message_id: str) -> dict:
+    """
+    Reads a single email, including its decoded body text.
+
+    Parameters:
+        message_id (str): The ID of the Gmail message to read.
+
+    Returns:
+        dict: Email details (sender, subject, date, snippet, body) or error message.
+    """
+    try:
+        service = get_gmail_service()
+        records = fetch_full_records(service, [message_id])
+        if not records:
+            return {"error": f"Email {message_id} not found."}
+        return records[0].to_dict()
+    except HttpError as error:
+        return f"An error occurred: {error}"
+
+
+def _search_gmail(service, max_results, keyword, sender, subject, after, before):
+    """
+    Runs a search through messages.list and returns metadata EmailRecords.
+    """
+    # Construct the search query
+    query_parts = []
+    if keyword:
+        query_parts.append(keyword)
+    if sender:
+        query_parts.append(f"from:{sender}")
+    if subject:
+        query_parts.append(f"subject:{subject}")
+    if after:
+        query_parts.append(f"after:{to_query_date(after)}")
+    if before:
+        query_parts.append(f"before:{to_query_date(before)}")
+    query = " ".join(query_parts)
+
+    # Search for messages
+    results = (
+        service.users()
+        .messages()
+        .list(userId="me", q=query, maxResults=max_results)
+        .execute()
+    )
+    messages = results.get("messages", [])
+    return fetch_email_records(service, [msg["id"] for msg in messages])
+
+
 def set_auto_reply(
     enable: bool, subject: str, message: str, start_time: int, end_time: int
 ):
@@ -207,43 +247,81 @@ def set_auto_reply(
     return result
 
 
-def download_attachments(message_id: str):
+def _attachment_result(entry):
+    return {
+        "files": [
+            {"filename": file["filename"], "path": file["path"]}
+            for file in entry["files"]
+        ],
+        "skipped": entry["skipped"],
+    }
+
+
+def download_attachments(message_id: str) -> dict:
     """
     Downloads all attachments from a Gmail message.
 
+    Attachments are fetched concurrently and stored under their content hash,
+    so downloading the same file again costs nothing. Attachments beyond the
+    per-message size limit are skipped.
+
     Parameters:
         message_id (str): The ID of the Gmail message to extract attachments from.
 
     Returns:
-        List[str]: List of file paths to the downloaded attachments.
+        dict: "files" with the {"filename", "path"} of each downloaded attachment
+              and "skipped" with the names of attachments over the size limit.
     """
+    download_dir, max_workers, max_bytes = attachment_settings()
+    previous = lookup_downloaded(message_id, download_dir)
+    # Reuse the last result unless a raised limit would now admit skipped files
+    if previous is not None and (
+        not previous["skipped"] or previous["max_bytes"] >= max_bytes
+    ):
+        return _attachment_result(previous)
+    stored = {file["part_id"]: file for file in previous["files"]} if previous else {}
+
     service = get_gmail_service()
     message = service.users().messages().get(userId="me", id=message_id).execute()
-    download_dir: str = "./attachments"
-    if not os.path.exists(download_dir):
-        os.makedirs(download_dir)
-
-    attachments = []
-
-    for part in message["payload"].get("parts", []):
-        filename = part.get("filename")
-        body = part.get("body", {})
-        if filename and "attachmentId" in body:
-            attachment_id = body["attachmentId"]
-            attachment = (
+
+    to_download = []
+    skipped = []
+    total_size = 0
+    for part in iter_attachment_parts(message["payload"]):
+        size = part.get("body", {}).get("size", 0)
+        if total_size + size > max_bytes:
+            skipped.append(part["filename"])
+            continue
+        total_size += size
+        to_download.append(part)
+
+    def download(part):
+        if part.get("partId") in stored:
+            return stored[part["partId"]]
+        body = part["body"]
+        data = body.get("data")
+        if not data:
+            data = (
                 service.users()
                 .messages()
                 .attachments()
-                .get(userId="me", messageId=message_id, id=attachment_id)
-                .execute()
+                .get(userId="me", messageId=message_id, id=body["attachmentId"])
+                .execute()["data"]
             )
-            file_data = base64.urlsafe_b64decode(attachment["data"].encode("UTF-8"))
-            file_path = os.path.join(download_dir, filename)
-            with open(file_path, "wb") as f:
-                f.write(file_data)
-            attachments.append(file_path)
+        return {
+            "part_id": part.get("partId"),
+            "filename": part["filename"],
+            "path": store_base64(data, part["filename"], download_dir),
+        }
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        files = list(executor.map(download, to_download))
 
-    return attachments
+    # Partial results are recorded too, so the files under the limit are not
+    # fetched again on the next call
+    entry = {"files": files, "skipped": skipped, "max_bytes": max_bytes}
+    record_downloaded(message_id, entry, download_dir)
+    return _attachment_result(entry)
 
 
 def reply_email(message_id: str, reply_text: str):
@@ -286,12 +364,15 @@ def reply_email(message_id: str, reply_text: str):
     return sent
 
 
-def mark_email(message_ids, read: Optional[str] = None, starred: Optional[str] = None):
+def mark_email(
+    message_ids: List[str], read: Optional[bool] = None, starred: Optional[bool] = None
+) -> dict:
     """
     Marks Gmail messages as read/unread or starred/unstarred.
 
     This function modifies the labels of one or more Gmail messages to update their read or starred status.
     You can use it to mark messages as read, unread, starred, or unstarred by specifying the appropriate flags.
+    Any number of messages can be passed at once; they are updated in bulk.
 
     Parameters:
         message_ids (List[str]): A list of Gmail message IDs to modify.
@@ -305,10 +386,10 @@ def mark_email(message_ids, read: Optional[str] = None, starred: Optional[str] =
             - None to leave starred status unchanged.
 
     Returns:
-        None
+        dict: Number of modified messages and the result of each chunk of up to 1000 messages.
     """
 
-    service = get_gmail_service
+    service = get_gmail_service()
     labels_to_add = []
     labels_to_remove = []
 
@@ -324,9 +405,22 @@ def mark_email(message_ids, read: Optional[str] = None, starred: Optional[str] =
         else:
             labels_to_remove.append("STARRED")
 
-    for msg_id in message_ids:
-        service.users().messages().modify(
-            userId="me",
-            id=msg_id,
-            body={"addLabelIds": labels_to_add, "removeLabelIds": labels_to_remove},
-        ).execute()
+    message_ids = list(dict.fromkeys(message_ids))
+    modified = 0
+    chunks = []
+    for start in range(0, len(message_ids), BATCH_MODIFY_LIMIT):
+        chunk = message_ids[start : start + BATCH_MODIFY_LIMIT]
+        try:
+            service.users().messages().batchModify(
+                userId="me",
+                body={
+                    "ids": chunk,
+                    "addLabelIds": labels_to_add,
+                    "removeLabelIds": labels_to_remove,
+                },
+            ).execute()
+            modified += len(chunk)
+            chunks.append({"count": len(chunk), "status": "ok"})
+        except HttpError as error:
+            chunks.append({"count": len(chunk), "status": "error", "error": str(error)})
+    return {"modified": modified, "chunks": chunks}
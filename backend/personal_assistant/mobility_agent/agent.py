@@ -1,5 +1,6 @@
 from personal_assistant.mobility_agent.tool import (
     estimate_travel_time,
+    estimate_travel_times,
     recommend_entertainment_places,
     recommend_food_places,
     get_current_weather,
@@ -15,6 +16,7 @@ mobility_agent = Agent(
     name="mobility_agent",
     tools=[
         estimate_travel_time,
+        estimate_travel_times,
         recommend_entertainment_places,
         recommend_food_places,
         get_current_weather,
@@ -45,6 +47,7 @@ You must ensure clarity and precision in your responses.
 
 3. **Use the Appropriate Tools:**
    - **Travel Time Estimation:** Use `estimate_travel_time` to calculate travel durations.
+   - **Comparing Several Trips:** When more than one origin or destination is involved (e.g., "which of these restaurants is closest to my meeting?"), call `estimate_travel_times` ONCE with all origins and destinations instead of calling `estimate_travel_time` repeatedly. Use `fastest` or the `seconds` values to compare.
    - **Entertainment Recommendations:** Use `recommend_entertainment_places` for nearby entertainment options.
    - **Food Recommendations:** Use `recommend_food_places` for dining suggestions.
    - **Weather Updates:** Use `get_current_weather` or `get_future_weather` for weather information.
@@ -0,0 +1,130 @@
+from collections import OrderedDict
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+
+# Defaults for the settings of the same name, read in get_geocode_cache().
+# SQLite file that keeps geocode results across restarts; set to "" to keep
+# them in memory only.
+GEOCODE_CACHE_PATH = "geocode_cache.sqlite3"
+GEOCODE_CACHE_SIZE = 512
+# Addresses rarely move, but place ids and formatted addresses do get updated.
+GEOCODE_CACHE_TTL_SECONDS = 30 * 24 * 3600
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS geocodes (
+    address TEXT PRIMARY KEY,
+    result TEXT,
+    stored_at REAL
+);
+"""
+
+
+def normalize_address(address):
+    """
+    Cache key for an address: case, spacing and punctuation differences
+    ("Richardson,TX" vs "richardson, tx.") map to the same entry.
+    """
+    address = re.sub(r"\s*,\s*", ", ", address.casefold())
+    address = re.sub(r"\s+", " ", address)
+    return address.strip(" .,")
+
+
+class GeocodeCache:
+    """
+    Geocode results keyed by normalized address: an in-process LRU in front
+    of an optional SQLite table. Entries older than the TTL are ignored.
+    """
+
+    def __init__(
+        self,
+        path=GEOCODE_CACHE_PATH,
+        max_entries=GEOCODE_CACHE_SIZE,
+        ttl=GEOCODE_CACHE_TTL_SECONDS,
+    ):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = None
+        if path:
+            try:
+                self._conn = sqlite3.connect(path, check_same_thread=False)
+                self._conn.executescript(_SCHEMA)
+            except sqlite3.Error as e:
+                print(f"Geocode cache at {path} unavailable, using memory only: {e}")
+                self._conn = None
+
+    def _remember(self, key, result, stored_at):
+        self._entries[key] = (result, stored_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def get(self, address):
+        key = normalize_address(address)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and now - entry[1] < self.ttl:
+                self._entries.move_to_end(key)
+                return entry[0]
+            if self._conn is None:
+                return None
+            try:
+                row = self._conn.execute(
+                    "SELECT result, stored_at FROM geocodes WHERE address = ?",
+                    (key,),
+                ).fetchone()
+            except sqlite3.Error:
+                return None
+            if row is None or now - row[1] >= self.ttl:
+                return None
+            result = json.loads(row[0])
+            self._remember(key, result, row[1])
+            return result
+
+    def put(self, address, result):
+        key = normalize_address(address)
+        now = time.time()
+        with self._lock:
+            self._remember(key, result, now)
+            if self._conn is None:
+                return
+            try:
+                with self._conn:
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO geocodes VALUES (?, ?, ?)",
+                        (key, json.dumps(result), now),
+                    )
+            except sqlite3.Error as e:
+                print(f"Failed to persist geocode for {key}: {e}")
+
+
+_geocode_cache = None
+_geocode_cache_lock = threading.Lock()
+
+
+def get_geocode_cache():
+    """
+    Returns the process-wide geocode cache, configured from the environment
+    on first use rather than at import, so settings from .env apply.
+    """
+    global _geocode_cache
+    with _geocode_cache_lock:
+        if _geocode_cache is None:
+            _geocode_cache = GeocodeCache(
+                path=os.getenv("GEOCODE_CACHE_PATH", GEOCODE_CACHE_PATH),
+                max_entries=int(
+                    os.getenv("GEOCODE_CACHE_SIZE", str(GEOCODE_CACHE_SIZE))
+                ),
+                ttl=int(
+                    os.getenv(
+                        "GEOCODE_CACHE_TTL_SECONDS", str(GEOCODE_CACHE_TTL_SECONDS)
+                    )
+                ),
+            )
+        return _geocode_cache
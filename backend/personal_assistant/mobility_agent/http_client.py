@@ -0,0 +1,71 @@
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import os
+import requests
+import threading
+
+# Defaults for the (connect, read) timeouts in seconds of every Maps, Weather
+# and Places call and for the retry count; overridden by MOBILITY_CONNECT_TIMEOUT,
+# MOBILITY_READ_TIMEOUT and MOBILITY_MAX_RETRIES, read on use so .env applies.
+CONNECT_TIMEOUT = 3.05
+READ_TIMEOUT = 10
+MAX_RETRIES = 3
+# Keep-alive connections kept per host; tools may fan out across threads.
+POOL_SIZE = 10
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def _timeout():
+    return (
+        float(os.getenv("MOBILITY_CONNECT_TIMEOUT", str(CONNECT_TIMEOUT))),
+        float(os.getenv("MOBILITY_READ_TIMEOUT", str(READ_TIMEOUT))),
+    )
+
+
+def _build_session():
+    retry = Retry(
+        total=int(os.getenv("MOBILITY_MAX_RETRIES", str(MAX_RETRIES))),
+        status_forcelist=(429, 500, 502, 503, 504),
+        # Places searchNearby is a read-only POST, so it is safe to retry too
+        allowed_methods=frozenset({"GET", "POST"}),
+        backoff_factor=0.5,
+        backoff_jitter=0.5,
+        respect_retry_after_header=True,
+        # Hand the last 429/5xx response back instead of raising, so callers
+        # keep reporting API errors the way they already do
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=POOL_SIZE, max_retries=retry)
+    session = requests.Session()
+    session.mount("https://", adapter)
+    return session
+
+
+def get_session():
+    """
+    Returns the process-wide session shared by all mobility tools, so calls
+    to the same Google host reuse a pooled keep-alive connection.
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = _build_session()
+        return _session
+
+
+def get(url, **kwargs):
+    """
+    requests.get through the shared session, with default timeouts and retries.
+    """
+    kwargs.setdefault("timeout", _timeout())
+    return get_session().get(url, **kwargs)
+
+
+def post(url, **kwargs):
+    """
+    requests.post through the shared session, with default timeouts and retries.
+    """
+    kwargs.setdefault("timeout", _timeout())
+    return get_session().post(url, **kwargs)
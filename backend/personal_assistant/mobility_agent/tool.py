@@ -1,4 +1,14 @@
-import requests
+from concurrent.futures import ThreadPoolExecutor
+from personal_assistant.mobility_agent import http_client
+from personal_assistant.mobility_agent.geocode_cache import get_geocode_cache
+from personal_assistant.mobility_agent.weather_cache import (
+    CURRENT_TTL_SECONDS,
+    HOURLY_TTL_SECONDS,
+    geohash,
+    get_weather_cache,
+)
+from requests import RequestException
+from typing import List
 import urllib.parse
 import json
 import os
@@ -7,6 +17,16 @@ from dotenv import load_dotenv
 load_dotenv()
 
 API_KEY = os.getenv("MOBILITY_API_KEY")
+# Recommendations are ranked by a rating average that assumes this many
+# extra reviews of this rating, so places with few reviews do not dominate.
+PRIOR_RATING = 4.0
+PRIOR_RATING_COUNT = 20
+# Distance Matrix request limits.
+MATRIX_MAX_ORIGINS = 25
+MATRIX_MAX_DESTINATIONS = 25
+MATRIX_MAX_ELEMENTS = 100
+# Matrix chunks requested at the same time when a table exceeds one request.
+MATRIX_MAX_WORKERS = 4
 
 
 def estimate_travel_time(start: str, destination: str, mode: str) -> str:
@@ -30,8 +50,11 @@ def estimate_travel_time(start: str, destination: str, mode: str) -> str:
         "departure_time": "now",
         "key": API_KEY,
     }
-    response = requests.get(url, params=params)
-    data = response.json()
+    try:
+        response = http_client.get(url, params=params)
+        data = response.json()
+    except RequestException:
+        return "Error: Unable to fetch travel time."
 
     if response.status_code == 200 and "rows" in data:
         duration = data["rows"][0]["elements"][0]["duration"]["text"]
@@ -40,21 +63,100 @@ def estimate_travel_time(start: str, destination: str, mode: str) -> str:
         return "Error: Unable to fetch travel time."
 
 
-def geocode_address_coordinates(address):
-    url = "https://maps.googleapis.com/maps/api/geocode/json"
-    params = {"address": address, "key": API_KEY}
-    response = requests.get(url, params=params)
-    data = response.json()
-    if response.status_code == 200 and data["results"]:
-        location = data["results"][0]["geometry"]["location"]
-        return location["lat"], location["lng"]
-    else:
-        return None, None
+def _distance_matrix_chunk(origins, destinations, mode):
+    url = "https://maps.googleapis.com/maps/api/distancematrix/json"
+    params = {
+        "origins": "|".join(origins),
+        "destinations": "|".join(destinations),
+        "mode": mode,
+        "departure_time": "now",
+        "key": API_KEY,
+    }
+    try:
+        response = http_client.get(url, params=params)
+        data = response.json()
+    except RequestException:
+        return None
+    if response.status_code != 200 or data.get("status") != "OK":
+        return None
+    return data["rows"]
+
+
+def estimate_travel_times(
+    origins: List[str], destinations: List[str], mode: str
+) -> dict:
+    """
+    Estimates travel times from every origin to every destination at once
+    using the Google Maps Distance Matrix API.
+
+    Args:
+        origins (list): Starting addresses or location names.
+        destinations (list): Destination addresses or location names.
+        mode (str): Mode of transportation. Options include 'driving', 'walking', 'bicycling', or 'transit'.
+
+    Returns:
+        dict: "origins", "destinations" and "rows", where rows[i][j] is
+              {"duration", "distance", "seconds"} for origins[i] to
+              destinations[j] (or {"status"} if no route was found), and
+              "fastest" naming the quickest destination for each origin.
+    """
+    if not origins or not destinations:
+        return {"error": "At least one origin and one destination are required."}
+    # API limits: 25 origins, 25 destinations and 100 elements per request
+    dest_step = min(len(destinations), MATRIX_MAX_DESTINATIONS)
+    origin_step = min(MATRIX_MAX_ORIGINS, MATRIX_MAX_ELEMENTS // dest_step)
+    chunks = [
+        (i, j)
+        for i in range(0, len(origins), origin_step)
+        for j in range(0, len(destinations), dest_step)
+    ]
+    with ThreadPoolExecutor(
+        max_workers=min(len(chunks), MATRIX_MAX_WORKERS)
+    ) as executor:
+        results = list(
+            executor.map(
+                lambda chunk: _distance_matrix_chunk(
+                    origins[chunk[0] : chunk[0] + origin_step],
+                    destinations[chunk[1] : chunk[1] + dest_step],
+                    mode,
+                ),
+                chunks,
+            )
+        )
+
+    rows = [[{"status": "ERROR"}] * len(destinations) for _ in origins]
+    for (i, j), chunk_rows in zip(chunks, results):
+        for di, row in enumerate(chunk_rows or []):
+            for dj, element in enumerate(row["elements"]):
+                if element.get("status") == "OK":
+                    cell = {
+                        "duration": element["duration"]["text"],
+                        "distance": element["distance"]["text"],
+                        "seconds": element["duration"]["value"],
+                    }
+                else:
+                    cell = {"status": element.get("status")}
+                rows[i + di][j + dj] = cell
+
+    fastest = []
+    for row in rows:
+        reachable = [
+            (cell["seconds"], j) for j, cell in enumerate(row) if "seconds" in cell
+        ]
+        fastest.append(destinations[min(reachable)[1]] if reachable else None)
+    return {
+        "origins": origins,
+        "destinations": destinations,
+        "rows": rows,
+        "fastest": fastest,
+    }
 
 
 def geocode(address):
     """
     Geocodes a given address using the Google Maps Geocoding API.
+    Results are cached by normalized address (see geocode_cache), so repeat
+    addresses do not call the API.
     Args:
         address (str): The address or location name to geocode.
     Returns:
@@ -62,27 +164,67 @@ def geocode(address):
               formatted address ('address'), and place ID ('place_id') if successful.
         or string: An error message if geocoding fails.
     """
+    cache = get_geocode_cache()
+    cached = cache.get(address)
+    if cached is not None:
+        return cached
     base_url = "https://maps.googleapis.com/maps/api/geocode/json"
     params = {"address": address, "key": API_KEY}
-    response = requests.get(base_url, params=params)
-    data = response.json()
-    if data["status"] != "OK":
-        return "Error: Unable to fetch weather data."
+    try:
+        data = http_client.get(base_url, params=params).json()
+    except RequestException:
+        return f"Error: Unable to geocode address '{address}'."
+    if data.get("status") != "OK" or not data.get("results"):
+        return f"Error: Unable to geocode address '{address}'."
     result = data["results"][0]
     location = result["geometry"]["location"]
     place_id = result["place_id"]
     formatted_address = result["formatted_address"]
-    return {
+    geocoded = {
         "lat": location["lat"],
         "lng": location["lng"],
         "address": formatted_address,
         "place_id": place_id,
     }
+    cache.put(address, geocoded)
+    return geocoded
+
+
+def _fetch_current_weather(lat, lng):
+    url = "https://weather.googleapis.com/v1/currentConditions:lookup"
+    params = {"location.latitude": lat, "location.longitude": lng, "key": API_KEY}
+    try:
+        response = http_client.get(url, params=params)
+        if response.status_code == 200:
+            return response.json()
+    except RequestException as e:
+        return {"error": f"Unable to fetch weather data: {e}"}
+    return {
+        "error": f"Unable to fetch weather data: {response.status_code} - {response.text}"
+    }
+
+
+def _fetch_future_weather(lat, lng):
+    url = "https://weather.googleapis.com/v1/forecast/hours:lookup"
+    params = {
+        "location.latitude": lat,
+        "location.longitude": lng,
+        "hours": 24,
+        "key": API_KEY,
+    }
+    try:
+        response = http_client.get(url, params=params)
+        if response.status_code == 200:
+            return response.json()
+    except RequestException:
+        pass
+    return {"error": "Unable to fetch weather data"}
 
 
 def get_current_weather(address: str) -> dict:
     """
     Retrieves the current weather conditions for a given address.
+    Served from a cache shared by nearby addresses (see weather_cache).
 
     Args:
         address (str): The address or location name to get weather information for.
@@ -91,24 +233,21 @@ def get_current_weather(address: str) -> dict:
         dict: A dictionary containing current conditions if successful,
                 or an error message if geocoding or weather data retrieval fails.
     """
-    lat, lng = geocode_address_coordinates(address)
-    if lat is None or lng is None:
+    location = geocode(address)
+    if not isinstance(location, dict):
         return {"error": "Unable to geocode address"}
-
-    url = "https://weather.googleapis.com/v1/currentConditions:lookup"
-    params = {"location.latitude": lat, "location.longitude": lng, "key": API_KEY}
-    response = requests.get(url, params=params)
-    if response.status_code == 200:
-        return response.json()
-    else:
-        return {
-            "error": f"Unable to fetch weather data: {response.status_code} - {response.text}"
-        }
+    lat, lng = location["lat"], location["lng"]
+    return get_weather_cache().get(
+        (geohash(lat, lng), "current"),
+        CURRENT_TTL_SECONDS,
+        lambda: _fetch_current_weather(lat, lng),
+    )
 
 
 def get_future_weather(address: str) -> dict:
     """
     Retrieves the future weather conditions for a given address.
+    Served from a cache shared by nearby addresses (see weather_cache).
 
     Args:
         address (str): The address or location name to get weather information for.
@@ -117,21 +256,15 @@ def get_future_weather(address: str) -> dict:
         dict: A dictionary ontaining the future weather details if successful,
                 or an error message if geocoding or weather data retrieval fails.
     """
-    lat, lng = geocode_address_coordinates(address)
-    if lat is None or lng is None:
+    location = geocode(address)
+    if not isinstance(location, dict):
         return {"error": "Unable to geocode address"}
-    url = "https://weather.googleapis.com/v1/forecast/hours:lookup"
-    params = {
-        "location.latitude": lat,
-        "location.longitude": lng,
-        "hours": 24,
-        "key": API_KEY,
-    }
-    response = requests.get(url, params=params)
-    if response.status_code == 200:
-        return response.json()
-    else:
-        return {"error": "Unable to fetch weather data"}
+    lat, lng = location["lat"], location["lng"]
+    return get_weather_cache().get(
+        (geohash(lat, lng), "hourly"),
+        HOURLY_TTL_SECONDS,
+        lambda: _fetch_future_weather(lat, lng),
+    )
 
 
 def get_uber_link(pickup_address: str, dropoff_address: str) -> str:
@@ -146,10 +279,15 @@ def get_uber_link(pickup_address: str, dropoff_address: str) -> str:
         dropoff_address (str): The destination address for the Uber ride.
 
     Returns:
-        str: A URL (deep link) that opens the Uber app or website with the pickup and dropoff locations pre-filled.
+        str: A URL (deep link) that opens the Uber app or website with the pickup and dropoff locations pre-filled,
+             or an error message if either address cannot be geocoded.
     """
     pickup = geocode(pickup_address)
+    if not isinstance(pickup, dict):
+        return pickup
     dropoff = geocode(dropoff_address)
+    if not isinstance(dropoff, dict):
+        return dropoff
 
     # Build pickup and dropoff JSON objects
     pickup_data = {
@@ -224,17 +362,18 @@ def recommend_food_places(address: str, num_results: int, food_type: str) -> lis
         food_type (str): The type of food place to search for ("restaurant", "cafe", "bakery", "bar", "meal_takeaway"). If None, this function will search all types.
 
     Returns:
-        list: A list of dictionaries, each containing information about a recommended food place (name, address, rating, opening hours).
+        list: A list of dictionaries, each containing information about a recommended food place (name, address, rating, opening hours), best rated first.
     """
-    lat, lng = geocode_address_coordinates(address)
+    location = geocode(address)
+    if not isinstance(location, dict):
+        return []
+    lat, lng = location["lat"], location["lng"]
     food_types = (
         [food_type]
         if food_type
         else ["restaurant", "cafe", "bakery", "bar", "meal_takeaway"]
     )
-    food_recommendations = []
-    for place_type in food_types:
-        food_recommendations.extend(nearby_search(lat, lng, place_type, num_results))
+    food_recommendations = search_place_types(lat, lng, food_types, num_results)
     return format_recommendations(food_recommendations)
 
 
@@ -255,9 +394,12 @@ def recommend_entertainment_places(
         entertainment_type (str): The type of entertainment place to search for ("movie_theater", "amusement_park", "night_club", "bowling_alley", "museum"). If None, this function will search all types.
 
     Returns:
-        list: A list of dictionaries, each containing information about a recommended entertainment place (name, address, rating, opening hours).
+        list: A list of dictionaries, each containing information about a recommended entertainment place (name, address, rating, opening hours), best rated first.
     """
-    lat, lng = geocode_address_coordinates(address)
+    location = geocode(address)
+    if not isinstance(location, dict):
+        return []
+    lat, lng = location["lat"], location["lng"]
     entertainment_types = (
         [entertainment_type]
         if entertainment_type
@@ -269,21 +411,46 @@ def recommend_entertainment_places(
             "museum",
         ]
     )
-    entertainment_recommendations = []
-    for place_type in entertainment_types:
-        entertainment_recommendations.extend(
-            nearby_search(lat, lng, place_type, num_results)
-        )
-
+    entertainment_recommendations = search_place_types(
+        lat, lng, entertainment_types, num_results
+    )
     return format_recommendations(entertainment_recommendations)
 
 
+def _place_score(place):
+    """
+    Rating shrunk towards PRIOR_RATING by PRIOR_RATING_COUNT virtual reviews,
+    so a 5.0 from 3 reviews does not outrank a 4.7 from 2,000.
+    """
+    count = place.get("userRatingCount", 0)
+    rating = place.get("rating", PRIOR_RATING)
+    return (count * rating + PRIOR_RATING_COUNT * PRIOR_RATING) / (
+        count + PRIOR_RATING_COUNT
+    )
+
+
+def search_place_types(lat, lng, place_types, num_results):
+    """
+    Runs nearby_search for every place type concurrently, keeps one copy of
+    places that matched several types, and ranks them by _place_score.
+    """
+    with ThreadPoolExecutor(max_workers=len(place_types)) as executor:
+        results = executor.map(
+            lambda place_type: nearby_search(lat, lng, place_type, num_results),
+            place_types,
+        )
+        places = {}
+        for place in (place for result in results for place in result):
+            places.setdefault(place.get("id") or id(place), place)
+    return sorted(places.values(), key=_place_score, reverse=True)
+
+
 def nearby_search(lat, lng, place_type, num_results):
     url = "https://places.googleapis.com/v1/places:searchNearby"
     headers = {
         "Content-Type": "application/json",
         "X-Goog-Api-Key": API_KEY,
-        "X-Goog-FieldMask": "places.displayName,places.formattedAddress,places.rating,places.currentOpeningHours.weekdayDescriptions,places.priceRange",
+        "X-Goog-FieldMask": "places.id,places.displayName,places.formattedAddress,places.rating,places.userRatingCount,places.currentOpeningHours.weekdayDescriptions,places.priceRange",
     }
     body = {
         "includedTypes": [place_type],
@@ -293,6 +460,8 @@ def nearby_search(lat, lng, place_type, num_results):
         },
     }
 
-    response = requests.post(url, headers=headers, json=body)
-    data = response.json()
+    try:
+        data = http_client.post(url, headers=headers, json=body).json()
+    except RequestException:
+        return []
     return data.get("places", [])
@@ -0,0 +1,112 @@
+import threading
+import time
+
+# Precision 5 cells are about 4.9 km x 4.9 km: every address in a cell
+# shares one cached forecast.
+GEOHASH_PRECISION = 5
+CURRENT_TTL_SECONDS = 10 * 60
+HOURLY_TTL_SECONDS = 60 * 60
+# Past its TTL an entry is still served (while a background refresh runs)
+# until it is this many TTLs old; after that callers wait for a fresh fetch.
+MAX_STALE_TTLS = 6
+
+_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+
+def geohash(lat, lng, precision=GEOHASH_PRECISION):
+    """
+    Standard base32 geohash of a coordinate.
+    """
+    lat_range = [-90.0, 90.0]
+    lng_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    value = 0
+    even = True
+    while len(chars) < precision:
+        target, coord = (lng_range, lng) if even else (lat_range, lat)
+        mid = (target[0] + target[1]) / 2
+        value <<= 1
+        if coord >= mid:
+            value |= 1
+            target[0] = mid
+        else:
+            target[1] = mid
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(_BASE32[value])
+            bits = 0
+            value = 0
+    return "".join(chars)
+
+
+class WeatherCache:
+    """
+    Weather responses keyed by (geohash cell, endpoint) with
+    stale-while-revalidate: stale entries are returned immediately and
+    refreshed on a background thread, at most one fetch per key at a time.
+    """
+
+    def __init__(self):
+        self._entries = {}
+        self._in_flight = {}
+        self._lock = threading.Lock()
+
+    def _fetch(self, key, fetch):
+        """
+        Runs fetch for key unless another thread already is, in which case
+        waits for and shares that result. Errors (dicts with "error") are
+        returned but not cached.
+        """
+        with self._lock:
+            flight = self._in_flight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._in_flight[key] = {"done": threading.Event()}
+        if not leader:
+            flight["done"].wait()
+            return flight.get("value", {"error": "Unable to fetch weather data"})
+        try:
+            value = fetch()
+            flight["value"] = value
+            if isinstance(value, dict) and "error" not in value:
+                with self._lock:
+                    self._entries[key] = (value, time.monotonic())
+            return value
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+            flight["done"].set()
+
+    def _refresh_in_background(self, key, fetch):
+        with self._lock:
+            if key in self._in_flight:
+                return
+        threading.Thread(
+            target=self._fetch, args=(key, fetch), name="weather-refresh", daemon=True
+        ).start()
+
+    def get(self, key, ttl, fetch):
+        """
+        Returns the cached value for key, fetching it when missing or too
+        stale and refreshing it in the background when merely past ttl.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is not None:
+            value, fetched_at = entry
+            age = time.monotonic() - fetched_at
+            if age < ttl:
+                return value
+            if age < ttl * MAX_STALE_TTLS:
+                self._refresh_in_background(key, fetch)
+                return value
+        return self._fetch(key, fetch)
+
+
+_weather_cache = WeatherCache()
+
+
+def get_weather_cache():
+    return _weather_cache
@@ -0,0 +1,154 @@
+# Compares search_emails answered by the local full-text index against the
+# Gmail API path (messages.list + batched messages.get) on a synthetic
+# 50k-message mailbox.
+#
+# The API path runs the real search_emails code against a stand-in Gmail
+# client that sleeps --rtt-ms per HTTP round-trip, since a real account cannot
+# be filled with synthetic mail.
+#
+# Usage (from backend/, with the package installed via `poetry install`):
+#   python playground/bench_email_search.py [--messages 50000] [--rtt-ms 150]
+import argparse
+import itertools
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from personal_assistant.email_agent import tool
+from personal_assistant.email_agent.mailbox import MailboxMirror
+from personal_assistant.email_agent.message_utils import EmailRecord
+
+TOPICS = (
+    "invoice meeting report budget travel launch review contract offer team "
+    "update schedule design customer payment release quarterly hiring demo "
+    "feedback roadmap incident security training holiday lunch deadline"
+).split()
+# Filler vocabulary with a Zipf-like frequency, so topic words are as sparse
+# as they are in real mail.
+FILLER = [f"w{i}" for i in range(20000)]
+FILLER_WEIGHTS = list(
+    itertools.accumulate(1 / (rank + 1) for rank in range(len(FILLER)))
+)
+SENDERS = [f"user{i}@example{i % 17}.com" for i in range(500)]
+
+QUERIES = {
+    "keyword": {"keyword": "invoice payment"},
+    "sender": {"sender": "user42@example8.com"},
+    "subject": {"subject": "roadmap"},
+    "keyword+date": {"keyword": "contract", "after": "2024/06/01"},
+}
+
+
+def filler(rng, k):
+    return rng.choices(FILLER, cum_weights=FILLER_WEIGHTS, k=k)
+
+
+def synthetic_records(count):
+    rng = random.Random(7)
+    start = 1672531200000  # 2023-01-01
+    for i in range(count):
+        yield EmailRecord(
+            id=f"msg{i:06d}",
+            thread_id=f"thr{i // 3:06d}",
+            sender=rng.choice(SENDERS),
+            subject=" ".join(rng.sample(TOPICS, 2) + filler(rng, 3)),
+            date=None,
+            snippet=" ".join(filler(rng, 12)),
+            labels=("INBOX",),
+            internal_date=start + i * 60000,
+            body=" ".join([rng.choice(TOPICS)] + filler(rng, 120)),
+        )
+
+
+class _Request:
+    def __init__(self, rtt, result):
+        self.rtt = rtt
+        self.result = result
+
+    def execute(self):
+        time.sleep(self.rtt)
+        return self.result
+
+
+class SleepingGmail:
+    """Minimal Gmail client stand-in: one sleep per HTTP round-trip."""
+
+    def __init__(self, rtt):
+        self.rtt = rtt
+
+    def users(self):
+        return self
+
+    def messages(self):
+        return self
+
+    def list(self, userId, q=None, maxResults=100, **kwargs):
+        ids = [{"id": f"msg{i:06d}"} for i in range(maxResults)]
+        return _Request(self.rtt, {"messages": ids})
+
+    def get(self, userId, id, **kwargs):
+        return id
+
+    def new_batch_http_request(self, callback):
+        rtt = self.rtt
+
+        class Batch:
+            def __init__(self):
+                self.ids = []
+
+            def add(self, request, request_id):
+                self.ids.append(request_id)
+
+            def execute(self):
+                time.sleep(rtt)
+                for message_id in self.ids:
+                    callback(message_id, {"id": message_id, "payload": {}}, None)
+
+        return Batch()
+
+
+def median_ms(fn, runs):
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--messages", type=int, default=50000)
+    parser.add_argument("--max-results", type=int, default=20)
+    parser.add_argument("--rtt-ms", type=float, default=150)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), "bench_mailbox.sqlite3")
+    mirror = MailboxMirror(path)
+    start = time.perf_counter()
+    with mirror._conn:
+        mirror._upsert(synthetic_records(args.messages))
+    print(
+        f"Indexed {args.messages} messages in {time.perf_counter() - start:.1f}s "
+        f"(fts5={mirror.fts})"
+    )
+
+    # The API path, with the mirror disabled
+    tool.get_gmail_service = lambda: SleepingGmail(args.rtt_ms / 1000)
+
+    print(f"{'query':<16}{'local (ms)':>12}{'API (ms)':>12}")
+    for name, filters in QUERIES.items():
+        local = median_ms(lambda: mirror.query(args.max_results, **filters), args.runs)
+        api = median_ms(
+            lambda: tool.search_emails(args.max_results, **filters), args.runs
+        )
+        print(f"{name:<16}{local:>12.2f}{api:>12.1f}")
+
+    os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
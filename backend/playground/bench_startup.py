@@ -0,0 +1,90 @@
+# Measures the first-call (cold start) latency of the Google service getters.
+#
+# Each measurement runs in a fresh interpreter so nothing is cached in memory:
+#   before: googleapiclient.discovery.build(), i.e. the old get_google_service()
+#   after:  get_google_service() backed by the pre-serialized discovery cache
+#
+# Usage (from backend/, with the package installed via `poetry install`):
+#   python playground/bench_startup.py [--runs 5]
+# A throwaway token file is used, so no OAuth consent or network is needed.
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+SERVICES = {
+    "get_gmail_service": ("gmail", "v1"),
+    "get_calendar_service": ("calendar", "v3"),
+    "get_people_service": ("people", "v1"),
+}
+
+BEFORE = """
+import time
+from google.oauth2.credentials import Credentials
+from googleapiclient.discovery import build
+start = time.perf_counter()
+creds = Credentials.from_authorized_user_file({token!r})
+build({service!r}, {version!r}, credentials=creds)
+print(time.perf_counter() - start)
+"""
+
+AFTER = """
+import time
+from personal_assistant.common.tool_utils import get_google_service
+start = time.perf_counter()
+get_google_service({service!r}, {version!r}, token_file={token!r})
+print(time.perf_counter() - start)
+"""
+
+
+def run_once(template, service, version, token):
+    code = template.format(service=service, version=version, token=token)
+    output = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+    return float(output.stdout.strip().splitlines()[-1]) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    from personal_assistant.common.discovery_utils import prime_discovery_cache
+
+    prime_discovery_cache()
+
+    with tempfile.NamedTemporaryFile("w", suffix=".json", delete=False) as f:
+        json.dump(
+            {
+                "token": "bench",
+                "refresh_token": "bench",
+                "token_uri": "https://oauth2.googleapis.com/token",
+                "client_id": "bench",
+                "client_secret": "bench",
+                "expiry": "2999-01-01T00:00:00Z",
+            },
+            f,
+        )
+        token = f.name
+
+    try:
+        print(f"{'getter':<24}{'before (ms)':>14}{'after (ms)':>14}")
+        for getter, (service, version) in SERVICES.items():
+            before = [
+                run_once(BEFORE, service, version, token) for _ in range(args.runs)
+            ]
+            after = [run_once(AFTER, service, version, token) for _ in range(args.runs)]
+            print(
+                f"{getter:<24}{statistics.median(before):>14.1f}"
+                f"{statistics.median(after):>14.1f}"
+            )
+    finally:
+        os.remove(token)
+
+
+if __name__ == "__main__":
+    main()
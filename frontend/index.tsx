@@ -251,7 +251,7 @@ const App: React.FC = () => {
   const [showAuthPrompt, setShowAuthPrompt] = useState<boolean>(true);
   const [waitingForContinue, setWaitingForContinue] = useState(false);
 
-  const GOOGLE_AUTH_URL = `https://accounts.google.com/o/oauth2/auth?response_type=code&client_id=630391073901-nj714383nv367gkadb7jnojr12lm92c7.apps.googleusercontent.com&redirect_uri=http://127.0.0.1:8000/oauth2callback&scope=https%3A%2F%2Fwww.googleapis.com%2Fauth%2Fcalendar+https%3A%2F%2Fwww.googleapis.com%2Fauth%2Fcontacts+https%3A%2F%2Fwww.googleapis.com%2Fauth%2Fgmail.readonly+https%3A%2F%2Fwww.googleapis.com%2Fauth%2Fgmail.send&state=Jt81pmRr8D2ZxHTuoIBI08A5aaf4zu&prompt=consent&access_type=offline`;
+  const GOOGLE_AUTH_URL = `https://accounts.google.com/o/oauth2/auth?response_type=code&client_id=630391073901-nj714383nv367gkadb7jnojr12lm92c7.apps.googleusercontent.com&redirect_uri=http://127.0.0.1:8000/oauth2callback&scope=https%3A%2F%2Fwww.googleapis.com%2Fauth%2Fcalendar+https%3A%2F%2Fwww.googleapis.com%2Fauth%2Fcontacts+https%3A%2F%2Fwww.googleapis.com%2Fauth%2Fgmail.readonly+https%3A%2F%2Fwww.googleapis.com%2Fauth%2Fgmail.send+https%3A%2F%2Fwww.googleapis.com%2Fauth%2Fgmail.modify&state=Jt81pmRr8D2ZxHTuoIBI08A5aaf4zu&prompt=consent&access_type=offline`;
 
   const speakText = useCallback((text: string) => {
     if (assistantVolume > 0 && 'speechSynthesis' in window && 'SpeechSynthesisUtterance' in window) {
@@ -289,49 +289,85 @@ const App: React.FC = () => {
     setIsCalendarLoading(false);
   };
 
-  const initialload = async () => {
-    fetchCalendarEvents();
-    fetchWeather();
-    fetchInitialEmails();
-    // eslint-disable-next-line react-hooks/exhaustive-deps
+  const toEmailItem = (email: any, idx: number): EmailItem => ({
+    id: email.id || `mail-api-${idx}-${Date.now()}`,
+    sender: email.from || email.sender || "Unknown Sender",
+    subject: email.subject || "No Subject",
+    snippet: email.snippet || "",
+  });
+
+  const toCalendarEvent = (event: any, idx: number): CalendarEvent => ({
+    id: event.id || `cal-api-${idx}-${Date.now()}`,
+    time: event.time || event.start?.dateTime || event.start?.date || "Unknown Time",
+    title: event.title || event.summary || "No Title",
+  });
+
+  // Events without a parseable time go last
+  const eventStart = (event: CalendarEvent): number => {
+    const start = Date.parse(event.time);
+    return isNaN(start) ? Number.MAX_SAFE_INTEGER : start;
   };
 
-  const fetchWeather = async () => {
-    setIsWeatherLoading(true);
-    try {
-      const response = await fetch("http://127.0.0.1:8000/fetch_weather");
-      const data = await response.json();
-      setWeatherInfo(data.weather || null);
-    } catch (error) {
-      console.error("Failed to fetch weather:", error);
-      setWeatherInfo(null);
-    }
-    setIsWeatherLoading(false);
+  const byStartTime = (a: CalendarEvent, b: CalendarEvent): number => eventStart(a) - eventStart(b);
+
+  // Applies an {added, updated, removed} delta from the dashboard feed to a list keyed by id
+  const applyDelta = <T extends { id: string }>(items: T[], delta: any, convert: (raw: any, idx: number) => T): T[] => {
+    const added: T[] = (delta.added || []).map(convert);
+    const removed = new Set<string>([...(delta.removed || []), ...added.map((item) => item.id)]);
+    const updated = new Map<string, T>((delta.updated || []).map((raw: any, idx: number) => {
+      const item = convert(raw, idx);
+      return [item.id, item] as [string, T];
+    }));
+    const kept = items
+      .filter((item) => !removed.has(item.id))
+      .map((item) => updated.get(item.id) || item);
+    return [...added, ...kept];
   };
 
-  const fetchInitialEmails = async () => {
-    setIsEmailLoading(true);
-    try {
-      const response = await fetch("http://127.0.0.1:8000/fetch_latest_emails");
-      const data = await response.json();
-      if (data && Array.isArray(data.emails)) {
-        const newEmails: EmailItem[] = data.emails.map((email: any, idx: number) => ({
-          id: email.id || `mail-api-${idx}-${Date.now()}`,
-          sender: email.from || email.sender || "Unknown Sender",
-          subject: email.subject || "No Subject",
-          snippet: email.snippet || "",
-        }));
-        setEmailItems(newEmails);
-      } else {
-        setEmailItems([]);
-      }
-    } catch (error) {
-      console.error("Failed to fetch emails:", error);
-      setEmailItems([]);
+  const dashboardFeedRef = useRef<EventSource | null>(null);
+
+  // The backend pushes inbox, calendar and weather changes over SSE instead of the dashboard polling
+  const subscribeToDashboard = () => {
+    if (dashboardFeedRef.current) {
+      return;
     }
-    setIsEmailLoading(false);
+    setIsWeatherLoading(true);
+    const source = new EventSource("http://127.0.0.1:8000/dashboard/12345");
+    source.onmessage = (event) => {
+      const message = JSON.parse(event.data);
+      if (message.type === "snapshot") {
+        setEmailItems((message.emails || []).map(toEmailItem));
+        setCalendarEvents((message.events || []).map(toCalendarEvent));
+        setWeatherInfo(message.weather || null);
+        setIsWeatherLoading(false);
+      } else if (message.type === "emails") {
+        setEmailItems((items) => applyDelta(items, message, toEmailItem));
+      } else if (message.type === "events") {
+        setCalendarEvents((items) => applyDelta(items, message, toCalendarEvent).sort(byStartTime));
+      } else if (message.type === "weather") {
+        setWeatherInfo(message.weather || null);
+        setIsWeatherLoading(false);
+      }
+    };
+    source.onerror = (error) => {
+      // EventSource reconnects on its own
+      console.error("Dashboard feed error:", error);
+    };
+    dashboardFeedRef.current = source;
   };
 
+  useEffect(() => {
+    return () => {
+      dashboardFeedRef.current?.close();
+      dashboardFeedRef.current = null;
+    };
+  }, []);
+
+  const initialload = async () => {
+    // The first feed sync delivers the current inbox, calendar and weather
+    subscribeToDashboard();
+    // eslint-disable-next-line react-hooks/exhaustive-deps
+  };
 
   useEffect(() => {
     const welcomeMessageText = `Hello! I'm your AI assistant. How can I help you today? You can toggle my audio response using the switch in the top-left corner.`;